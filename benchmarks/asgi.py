@@ -0,0 +1,215 @@
+"""
+Пропускная способность страниц чтения под WSGI и под ASGI.
+
+Каждый режим запускается в отдельном процессе на своей временной базе:
+  wsgi       — синхронные страницы, приложение из wsgi.py, клиенты —
+               потоки (как воркер gunicorn с --threads);
+  asgi-sync  — те же синхронные страницы через asgi.py;
+  asgi       — асинхронные страницы (DJANGO_ASYNC_VIEWS=1) через asgi.py,
+               клиенты — задачи asyncio в одном цикле событий.
+
+Запросы выполняются прямо в процессе, без сети: --concurrency задаёт
+число одновременно ожидающих ответа клиентов, каждый из них шлёт
+запросы друг за другом, как по keep-alive соединению. Само удержание
+сотен открытых соединений — забота сервера (uvicorn, gunicorn) и здесь
+не измеряется; для этого нужен сетевой замер, например wrk -c 500.
+
+Запуск из корня репозитория:
+    python -m benchmarks.asgi --scale 1000 --concurrency 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from .loadtest import call_wsgi, prepare, run_route, summarize
+from .utils import ROOT_DIR
+
+MODES = {
+    'wsgi': {
+        'ya_news': 'yanews.wsgi',
+        'ya_note': 'yanote.wsgi',
+    },
+    'asgi-sync': {
+        'ya_news': 'yanews.asgi',
+        'ya_note': 'yanote.asgi',
+    },
+    'asgi': {
+        'ya_news': 'yanews.asgi',
+        'ya_note': 'yanote.asgi',
+    },
+}
+# Страницы, у которых есть асинхронная версия.
+READ_ROUTES = (
+    'news:home', 'news:detail', 'news:detail (auth)',
+    'notes:list', 'notes:detail',
+)
+
+
+async def call_asgi(application, path, cookie):
+    """Выполняет один запрос, возвращает статус и задержку в секундах."""
+    path, _, query = path.partition('?')
+    headers = [(b'host', b'localhost')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode()))
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': headers,
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    status = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(str(message['status']))
+
+    started = time.perf_counter()
+    await application(scope, receive, send)
+    return status[0], time.perf_counter() - started
+
+
+async def run_route_async(call, requests, concurrency):
+    """Опрашивает маршрут requests раз силами concurrency клиентов."""
+    results = []
+    numbers = iter(range(requests))
+
+    async def client():
+        # Общий итератор: клиент берёт следующий номер, пока они есть.
+        for _ in numbers:
+            results.append(await call())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    errors = sum(
+        not status.startswith(('200', '304')) for status, _ in results
+    )
+    return summarize([latency for _, latency in results], elapsed, errors)
+
+
+def measure(mode, application, cookie, routes, args):
+    results = {}
+    for name, path, auth in routes:
+        if name not in READ_ROUTES:
+            continue
+        client_cookie = cookie if auth else None
+        if mode == 'wsgi':
+            def call():
+                return call_wsgi(application, path, client_cookie)
+            # Прогрев: кэши, соединения, шаблоны.
+            for _ in range(10):
+                call()
+            results[name] = run_route(call, args.requests, args.concurrency)
+        else:
+            def call():
+                return call_asgi(application, path, client_cookie)
+
+            async def run():
+                for _ in range(10):
+                    await call()
+                return await run_route_async(
+                    call, args.requests, args.concurrency
+                )
+            results[name] = asyncio.run(run())
+        print(f'{args.worker} {mode} {name}: {results[name]}', file=sys.stderr)
+    return results
+
+
+def run_worker(args):
+    """Замер одного проекта в одном режиме; JSON печатается в stdout."""
+    if args.mode == 'asgi':
+        os.environ['DJANGO_ASYNC_VIEWS'] = '1'
+    with tempfile.TemporaryDirectory() as tmp:
+        application, cookie, routes = prepare(
+            args.worker, args.scale, os.path.join(tmp, 'bench.sqlite3'),
+            MODES[args.mode],
+        )
+        results = measure(args.mode, application, cookie, routes, args)
+    json.dump(results, sys.stdout)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--project', choices=(*MODES['wsgi'], 'all'), default='all'
+    )
+    parser.add_argument('--scale', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument(
+        '--requests', type=int, default=2000, help='запросов на маршрут'
+    )
+    parser.add_argument('--output', default='bench_asgi.json')
+    parser.add_argument(
+        '--worker', choices=MODES['wsgi'], help=argparse.SUPPRESS
+    )
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        return run_worker(args)
+    projects = MODES['wsgi'] if args.project == 'all' else (args.project,)
+    results = {
+        'meta': {
+            'scale': args.scale,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+        },
+        'projects': {},
+    }
+    for project in projects:
+        results['projects'][project] = {}
+        for mode in MODES:
+            # Настройки и адреса читаются при импорте: процесс на режим.
+            output = subprocess.run(
+                [
+                    sys.executable, '-m', 'benchmarks.asgi',
+                    '--worker', project,
+                    '--mode', mode,
+                    '--scale', str(args.scale),
+                    '--concurrency', str(args.concurrency),
+                    '--requests', str(args.requests),
+                ],
+                cwd=ROOT_DIR, check=True, stdout=subprocess.PIPE, text=True,
+            ).stdout
+            results['projects'][project][mode] = json.loads(output)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+    for project, modes in results['projects'].items():
+        for name in READ_ROUTES:
+            if name not in modes['wsgi']:
+                continue
+            print(f'{project} {name}: ' + ', '.join(
+                f'{mode} {modes[mode][name]["rps"]:.0f} RPS '
+                f'(p99 {modes[mode][name]["p99_ms"]:.0f} мс)'
+                for mode in MODES
+            ))
+    print(f'Результаты записаны в {args.output}')
+
+
+if __name__ == '__main__':
+    main()
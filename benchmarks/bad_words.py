@@ -0,0 +1,61 @@
+"""
+Сравнение проверки запрещённых слов: цикл по списку против
+скомпилированного выражения.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bad_words --words 5000 --text-length 20000
+"""
+import argparse
+import random
+
+from .utils import best_of, setup_django
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def legacy_search(words, text):
+    """Прежняя проверка из CommentForm.clean_text."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def random_word(rnd, min_length=5, max_length=12):
+    length = rnd.randint(min_length, max_length)
+    return ''.join(rnd.choice(ALPHABET) for _ in range(length))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--text-length', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django('ya_news')
+    from news.moderation import BadWordMatcher
+
+    rnd = random.Random(args.seed)
+    words = [random_word(rnd) for _ in range(args.words)]
+    text_words = []
+    while sum(map(len, text_words)) < args.text_length:
+        text_words.append(random_word(rnd, 2, 4))
+    # Худший случай для обеих проверок: запрещённых слов в тексте нет.
+    text = ' '.join(text_words)
+
+    build = best_of(lambda: BadWordMatcher(words), args.repeat)
+    matcher = BadWordMatcher(words)
+    legacy = best_of(lambda: legacy_search(words, text), args.repeat)
+    compiled = best_of(lambda: matcher.search(text), args.repeat)
+    print(f'Слов: {args.words}, длина текста: {len(text)}')
+    print(f'Сборка выражения:      {build * 1000:9.3f} мс (один раз)')
+    print(f'Цикл по списку:        {legacy * 1000:9.3f} мс')
+    print(f'Скомпилированное:      {compiled * 1000:9.3f} мс')
+    print(f'Ускорение:             {legacy / compiled:9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
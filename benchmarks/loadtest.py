@@ -0,0 +1,231 @@
+"""
+Нагрузочный замер WSGI-приложений yanews и yanote.
+
+Для каждого проекта во временной базе SQLite создаются данные заданного
+объёма, затем приложение опрашивается прямо в процессе, без сети, с
+заданной параллельностью. Для каждого маршрута считаются p50/p95/p99
+задержки и число запросов в секунду, результат пишется в JSON.
+
+Запуск из корня репозитория:
+    python -m benchmarks.loadtest --scale 1000 --concurrency 8 \\
+        --output bench.json --baseline previous.json --threshold 0.2
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .seed import SEEDERS
+from .utils import ROOT_DIR, setup_django
+
+WSGI_APPLICATIONS = {
+    'ya_news': 'yanews.wsgi',
+    'ya_note': 'yanote.wsgi',
+}
+
+
+def make_environ(path, cookie):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    return environ
+
+
+def call_wsgi(application, path, cookie):
+    """Выполняет один запрос, возвращает статус и задержку в секундах."""
+    status = []
+    started = time.perf_counter()
+    body = application(
+        make_environ(path, cookie),
+        lambda code, headers, exc_info=None: status.append(code)
+    )
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return status[0], time.perf_counter() - started
+
+
+def summarize(latencies, elapsed, errors):
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': cuts[49] * 1000,
+        'p95_ms': cuts[94] * 1000,
+        'p99_ms': cuts[98] * 1000,
+    }
+
+
+def run_route(call, requests, concurrency):
+    """Опрашивает маршрут requests раз в concurrency потоков."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(lambda _: call(), range(requests)))
+    elapsed = time.perf_counter() - started
+    errors = sum(
+        not status.startswith(('200', '304')) for status, _ in results
+    )
+    return summarize([latency for _, latency in results], elapsed, errors)
+
+
+def login_cookie(user_id):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    client = Client()
+    client.force_login(get_user_model().objects.get(pk=user_id))
+    session = client.cookies[settings.SESSION_COOKIE_NAME].value
+    return f'{settings.SESSION_COOKIE_NAME}={session}'
+
+
+def prepare(project, scale, database, applications=WSGI_APPLICATIONS):
+    """Создаёт базу и данные, возвращает приложение, куки и маршруты."""
+    os.environ['SQLITE_NAME'] = database
+    setup_django(project)
+    from django.conf import settings
+    from django.core.management import call_command
+
+    # Журнал запросов в режиме DEBUG исказил бы замер.
+    settings.DEBUG = False
+    call_command('migrate', verbosity=0)
+    user_id, routes = SEEDERS[project](scale)
+    module = __import__(applications[project], fromlist=['application'])
+    return module.application, login_cookie(user_id), routes
+
+
+def run_worker(args):
+    """Замер одного проекта; результат печатается в stdout как JSON."""
+    with tempfile.TemporaryDirectory() as tmp:
+        application, cookie, routes = prepare(
+            args.worker, args.scale, os.path.join(tmp, 'bench.sqlite3')
+        )
+        results = {}
+        for name, path, auth in routes:
+            def call():
+                return call_wsgi(application, path, cookie if auth else None)
+            # Прогрев: кэши, соединения, шаблоны.
+            for _ in range(min(args.requests, 10)):
+                call()
+            results[name] = run_route(call, args.requests, args.concurrency)
+            print(f'{args.worker} {name}: {results[name]}', file=sys.stderr)
+    json.dump(results, sys.stdout)
+
+
+def compare(results, baseline, threshold):
+    """Маршруты, у которых p95 вырос или RPS упал больше чем на threshold."""
+    regressions = []
+    for project, routes in results['projects'].items():
+        for name, current in routes.items():
+            previous = baseline.get('projects', {}).get(project, {}).get(name)
+            if previous is None:
+                continue
+            if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+                regressions.append(
+                    f'{project} {name}: p95 {previous["p95_ms"]:.2f} -> '
+                    f'{current["p95_ms"]:.2f} мс'
+                )
+            if current['rps'] < previous['rps'] * (1 - threshold):
+                regressions.append(
+                    f'{project} {name}: RPS {previous["rps"]:.1f} -> '
+                    f'{current["rps"]:.1f}'
+                )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--project', choices=(*WSGI_APPLICATIONS, 'all'), default='all'
+    )
+    parser.add_argument(
+        '--scale', type=int, default=1000,
+        help='число новостей, комментариев и заметок (1000, 100000, 1000000)'
+    )
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument(
+        '--requests', type=int, default=200, help='запросов на маршрут'
+    )
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--baseline', help='JSON прошлого замера')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='допустимое ухудшение относительно baseline, доля'
+    )
+    parser.add_argument(
+        '--worker', choices=WSGI_APPLICATIONS, help=argparse.SUPPRESS
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        return run_worker(args)
+    projects = WSGI_APPLICATIONS if args.project == 'all' else (args.project,)
+    results = {
+        'meta': {
+            'scale': args.scale,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+        },
+        'projects': {},
+    }
+    for project in projects:
+        # У каждого проекта свои настройки Django, поэтому отдельный процесс.
+        output = subprocess.run(
+            [
+                sys.executable, '-m', 'benchmarks.loadtest',
+                '--worker', project,
+                '--scale', str(args.scale),
+                '--concurrency', str(args.concurrency),
+                '--requests', str(args.requests),
+            ],
+            cwd=ROOT_DIR, check=True, stdout=subprocess.PIPE, text=True,
+        ).stdout
+        results['projects'][project] = json.loads(output)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+    print(f'Результаты записаны в {args.output}')
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f'Регрессия: {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Время поиска по заметкам одного автора на объёмной таблице.
+
+Заметки создаются во временной базе SQLite. Текст набирается из
+большого словаря редких слов и двух десятков частых, которые встречаются
+в тысячах заметок.
+
+Запуск из корня репозитория:
+    python -m benchmarks.search --notes 1000000 --authors 1000
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from .seed import _bulk_create
+from .utils import best_of, setup_django
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+COMMON_WORDS = (
+    'список покупок молоко хлеб встреча отчёт проект задача звонок идея '
+    'книга фильм поездка ремонт врач подарок праздник работа учёба спорт'
+).split()
+QUERIES = ('покупок', 'отчёт проект', 'рем', 'праздник подарок торт')
+
+
+RARE_WORDS_COUNT = 50000
+COMMON_SHARE = 0.2
+
+
+def random_text(rnd, words, length):
+    return ' '.join(
+        rnd.choice(COMMON_WORDS if rnd.random() < COMMON_SHARE else words)
+        for _ in range(length)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=100000)
+    parser.add_argument('--authors', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['SQLITE_NAME'] = os.path.join(tmp, 'search.sqlite3')
+        setup_django('ya_note')
+        from django.contrib.auth import get_user_model
+        from django.core.management import call_command
+        from notes.models import Note
+        from notes.search import search_notes
+
+        call_command('migrate', verbosity=0)
+        User = get_user_model()
+        _bulk_create(User, (
+            User(username=f'user{index}') for index in range(args.authors)
+        ))
+        user_ids = list(User.objects.values_list('id', flat=True))
+        rnd = random.Random(args.seed)
+        words = [
+            ''.join(rnd.choice(ALPHABET) for _ in range(rnd.randint(4, 10)))
+            for _ in range(RARE_WORDS_COUNT)
+        ]
+        _bulk_create(Note, (
+            Note(
+                title=random_text(rnd, words, 3),
+                text=random_text(rnd, words, 40),
+                slug=f'note-{index}',
+                author_id=user_ids[index % len(user_ids)],
+            )
+            for index in range(args.notes)
+        ))
+        author = User.objects.get(pk=user_ids[0])
+        print(f'Заметок: {args.notes}, авторов: {args.authors}')
+        # Частые слова встречаются в трети заметок, редкие — в десятках.
+        rare = [
+            word for word in Note.objects.filter(author=author).first()
+            .text.split() if word not in COMMON_WORDS
+        ]
+        for query in (*QUERIES, rare[0], f'{rare[1]} {rare[2]}'):
+            seconds = best_of(
+                lambda: search_notes(author, query), args.repeat
+            )
+            found = len(search_notes(author, query))
+            print(f'{query!r:28} {seconds * 1000:8.3f} мс, найдено {found}')
+
+
+if __name__ == '__main__':
+    main()
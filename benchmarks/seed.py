@@ -0,0 +1,101 @@
+"""
+Наполнение временной базы для нагрузочных замеров.
+
+Функции вызываются после setup_django() и возвращают маршруты для
+замера: (имя, путь, нужна ли авторизация).
+"""
+from datetime import date, timedelta
+from itertools import islice
+
+BATCH_SIZE = 5000
+USERS_COUNT = 100
+TEXT = 'Просто текст для замера производительности. ' * 20
+
+
+def _bulk_create(model, objects):
+    """Сохраняет генератор объектов пачками, не держа всё в памяти."""
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, BATCH_SIZE))
+        if not batch:
+            return
+        model.objects.bulk_create(batch)
+
+
+def _create_users():
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    _bulk_create(User, (
+        User(username=f'user{index}') for index in range(USERS_COUNT)
+    ))
+    return list(User.objects.order_by('id').values_list('id', flat=True))
+
+
+def seed_news(scale):
+    """scale новостей и scale комментариев к ним."""
+    from news.models import Comment, News
+
+    user_ids = _create_users()
+    today = date.today()
+    _bulk_create(News, (
+        News(
+            title=f'Новость {index}',
+            text=TEXT,
+            date=today - timedelta(days=index % 3650),
+        )
+        for index in range(scale)
+    ))
+    # Комментарии сосредоточены на свежих новостях, как и в жизни.
+    hot_ids = list(
+        News.objects.order_by('-date').values_list('id', flat=True)[:100]
+    )
+    _bulk_create(Comment, (
+        Comment(
+            news_id=hot_ids[index % len(hot_ids)],
+            author_id=user_ids[index % len(user_ids)],
+            text=f'Комментарий {index}\nвторая строка',
+        )
+        for index in range(scale)
+    ))
+    News.objects.recount_comments()
+    hot_id = hot_ids[0]
+    comment = Comment.objects.filter(author_id=user_ids[0]).first()
+    return user_ids[0], [
+        ('news:home', '/', False),
+        ('news:archive', '/archive/', False),
+        ('news:detail', f'/news/{hot_id}/', False),
+        ('news:detail (auth)', f'/news/{hot_id}/', True),
+        ('news:comments', f'/news/{hot_id}/comments/', False),
+        ('news:edit', f'/edit_comment/{comment.pk}/', True),
+    ]
+
+
+def seed_notes(scale):
+    """scale заметок, распределённых между пользователями."""
+    from notes.models import Note
+
+    user_ids = _create_users()
+    _bulk_create(Note, (
+        Note(
+            title=f'Заметка {index}',
+            text=TEXT,
+            slug=f'note-{index}',
+            author_id=user_ids[index % len(user_ids)],
+        )
+        for index in range(scale)
+    ))
+    note = Note.objects.filter(author_id=user_ids[0]).first()
+    return user_ids[0], [
+        ('notes:home', '/', False),
+        ('notes:list', '/notes/', True),
+        ('notes:detail', f'/note/{note.slug}/', True),
+        ('notes:edit', f'/edit/{note.slug}/', True),
+        ('notes:add', '/add/', True),
+    ]
+
+
+SEEDERS = {
+    'ya_news': seed_news,
+    'ya_note': seed_notes,
+}
@@ -0,0 +1,58 @@
+"""
+Стоимость адресов при массовом создании заметок: slugify из pytils на
+каждую строку против запоминающего build_slug.
+
+Заголовки берутся из небольшого набора, как при импорте типовых заметок
+(«Список покупок» и т. п.).
+
+Запуск из корня репозитория:
+    python -m benchmarks.slugify --notes 100000 --titles 500
+"""
+import argparse
+
+from .utils import best_of, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=100000)
+    parser.add_argument('--titles', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django('ya_note')
+    from notes.models import Note
+    from notes.slugs import build_slug
+    from pytils.translit import slugify
+
+    max_length = Note._meta.get_field('slug').max_length
+    titles = [
+        f'Список покупок на неделю номер {index % args.titles}'
+        for index in range(args.notes)
+    ]
+
+    def build_plain():
+        return [
+            Note(title=title, slug=slugify(title)[:max_length])
+            for title in titles
+        ]
+
+    def build_cached():
+        build_slug.cache_clear()
+        return [
+            Note(title=title, slug=build_slug(title, max_length))
+            for title in titles
+        ]
+
+    plain = best_of(build_plain, args.repeat)
+    cached = best_of(build_cached, args.repeat)
+    info = build_slug.cache_info()
+    print(f'Заметок: {args.notes}, разных заголовков: {args.titles}')
+    print(f'slugify на строку:     {plain * 1000:9.3f} мс')
+    print(f'build_slug:            {cached * 1000:9.3f} мс')
+    print(f'Ускорение:             {plain / cached:9.1f}x')
+    print(f'Попаданий в кэш:       {info.hits}, промахов: {info.misses}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+import os
+import sys
+import timeit
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+SETTINGS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+
+
+def setup_django(project):
+    """Подключает Django-проект из соседней директории."""
+    import django
+
+    sys.path.insert(0, str(ROOT_DIR / project))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', SETTINGS[project])
+    django.setup()
+
+
+def best_of(func, repeat, number=1):
+    """Лучшее время одного вызова func из repeat замеров, в секундах."""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
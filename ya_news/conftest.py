@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 from news.forms import BAD_WORDS
@@ -11,6 +12,11 @@ today = datetime.today()
 now = timezone.now()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create(username='Автор')
@@ -43,13 +49,38 @@ def news_more():
     return News.objects.bulk_create(all_news)
 
 
+@pytest.fixture
+def news_feed(author):
+    """Несколько сотен новостей, у первых из них тысячи комментариев."""
+    News.objects.bulk_create(
+        News(
+            title=f'Новость {index}',
+            text='Просто текст. ' * 50,
+            date=today - timedelta(days=index),
+        )
+        for index in range(300)
+    )
+    news_ids = list(News.objects.values_list('id', flat=True)[:20])
+    Comment.objects.bulk_create(
+        Comment(
+            news_id=news_ids[index % len(news_ids)],
+            author=author,
+            text=f'Комментарий {index}',
+        )
+        for index in range(3000)
+    )
+    News.objects.recount_comments()
+    return News.objects.get(pk=news_ids[0])
+
+
 @pytest.fixture
 def comment(news, author):
-    return Comment.objects.create(
+    comment = Comment.objects.create(
         text='Текст новости',
         news=news,
         author=author
     )
+    return comment
 
 
 @pytest.fixture
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Comment, News
+from .models import BannedWord, Comment, News
 
 
 class CommentInline(admin.StackedInline):
@@ -13,3 +13,12 @@ class NewsAdmin(admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        News.objects.filter(pk=form.instance.pk).recount_comments()
+
+
+@admin.register(BannedWord)
+class BannedWordAdmin(admin.ModelAdmin):
+    search_fields = ('word',)
@@ -0,0 +1,91 @@
+"""
+JSON для мобильных клиентов: лента новостей и комментарии новости.
+
+Строки читаются через values(), объекты моделей не создаются, ответ
+пишется потоком по записи. Страницы листаются по курсору, как архив:
+токен следующей страницы приходит в поле next. Параметр fields=id,title
+оставляет в записях только перечисленные поля.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+
+from .pagination import paginate_keyset
+
+# Поле ответа и его выражение для values().
+FEED_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'excerpt': 'excerpt',
+    'text': 'text',
+    'date': 'date',
+    'comment_count': 'comment_count',
+}
+FEED_DEFAULT = ('id', 'title', 'excerpt', 'date', 'comment_count')
+COMMENT_FIELDS = {
+    'id': 'id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+COMMENT_DEFAULT = ('id', 'author', 'text', 'created')
+
+
+def parse_fields(value, available, default):
+    """Поля из параметра fields; неизвестное поле — ValueError."""
+    if not value:
+        return default
+    names = tuple(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()
+    ))
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise ValueError(
+            'Неизвестные поля: {}. Доступны: {}.'.format(
+                ', '.join(unknown) or '-', ', '.join(available)
+            )
+        )
+    return names
+
+
+def dumps(value):
+    return json.dumps(
+        value, cls=DjangoJSONEncoder, ensure_ascii=False,
+        separators=(',', ':'),
+    )
+
+
+def stream_page(rows, lookups, next_cursor):
+    """Части ответа {"results": [...], "next": ...} по одной записи."""
+    yield '{"results":['
+    for index, row in enumerate(rows):
+        record = {name: row[lookup] for name, lookup in lookups.items()}
+        yield (',' if index else '') + dumps(record)
+    yield '],"next":' + dumps(next_cursor) + '}'
+
+
+def page_response(request, queryset, ordering, fields, default, per_page):
+    """Страница queryset после курсора из запроса с полями из fields=."""
+    try:
+        names = parse_fields(request.GET.get('fields'), fields, default)
+    except ValueError as error:
+        return JsonResponse({'detail': str(error)}, status=400)
+    lookups = {name: fields[name] for name in names}
+    # Поля ключа нужны для курсора, даже если клиент их не просил.
+    columns = {*lookups.values(), *(name.lstrip('-') for name in ordering)}
+    try:
+        rows, next_cursor = paginate_keyset(
+            queryset.values(*columns),
+            ordering,
+            request.GET.get('cursor'),
+            per_page,
+        )
+    except Http404 as error:
+        # Страницы HTML отвечают на плохой курсор 404, клиенту API нужен
+        # JSON с причиной.
+        return JsonResponse({'detail': str(error)}, status=400)
+    return StreamingHttpResponse(
+        stream_page(rows, lookups, next_cursor),
+        content_type='application/json',
+    )
@@ -0,0 +1,123 @@
+import re
+import threading
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from .conditional import page_state
+
+# Место для ссылок автора комментария в закэшированной ленте.
+COMMENT_ACTIONS_RE = re.compile(r'<!--comment-actions:(\d+):(\d+)-->')
+
+
+class PageCacheStats:
+    """Счётчики кэша страниц в текущем процессе."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.hit_seconds = 0.0
+
+    def record_hit(self, seconds):
+        with self._lock:
+            self.hits += 1
+            self.hit_seconds += seconds
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'hit_seconds_total': self.hit_seconds,
+            }
+
+
+page_cache_stats = PageCacheStats()
+
+
+def page_key(version, full_path):
+    """
+    Ключ страницы: адрес и версия её данных.
+
+    Версия читается из базы (см. news.conditional.page_state), поэтому
+    любое изменение сразу меняет ключ во всех процессах, даже если кэш у
+    каждого процесса свой.
+    """
+    raw = f'{sorted(version.items())}:{full_path}'
+    return f'news:page:{md5(raw.encode()).hexdigest()}'
+
+
+class AnonymousPageCacheMixin:
+    """
+    Отдаёт анонимным пользователям готовый ответ из кэша.
+
+    Ключ записи меняется вместе с версией данных страницы (page_state
+    по аргументам адреса); срок NEWS_PAGE_CACHE_TIMEOUT лишь страхует от
+    правок в обход сигналов.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+        started = time.perf_counter()
+        key = page_key(
+            page_state(request, **self.kwargs), request.get_full_path()
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            page_cache_stats.record_hit(time.perf_counter() - started)
+            return response
+        page_cache_stats.record_miss()
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            def store(response):
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    settings.NEWS_PAGE_CACHE_TIMEOUT
+                )
+            if getattr(response, 'is_rendered', True):
+                store(response)
+            else:
+                response.add_post_render_callback(store)
+        return response
+
+
+def thread_key(news_id, modified, cursor):
+    """Ключ страницы ленты: меняется вместе с отметкой изменения новости."""
+    digest = md5((cursor or '').encode()).hexdigest()
+    return f'news:thread:{news_id}:{modified.timestamp()}:{digest}'
+
+
+def add_comment_actions(html, user):
+    """
+    Подставляет в общую для всех ленту ссылки на правку своих комментариев.
+
+    Закэшированный HTML не зависит от пользователя: вместо ссылок в нём
+    стоят метки с автором комментария.
+    """
+    def replace(match):
+        comment_id, author_id = map(int, match.groups())
+        if not user.is_authenticated or author_id != user.pk:
+            return ''
+        return format_html(
+            '<a href="{}">Редактировать</a> |\n<a href="{}">Удалить</a>',
+            reverse('news:edit', args=(comment_id,)),
+            reverse('news:delete', args=(comment_id,)),
+        )
+    return mark_safe(COMMENT_ACTIONS_RE.sub(replace, html))
@@ -0,0 +1,58 @@
+from hashlib import md5
+
+from django.db.models import Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .models import FeedVersion, News
+
+
+def page_state(request, **kwargs):
+    """
+    Отметки свежести страницы, одним запросом на весь запрос пользователя.
+
+    Поле News.modified меняется и при правке новости, и при любом изменении
+    её комментариев, поэтому объекты загружать не нужно. Ленту описывает
+    строка FeedVersion: агрегаты по таблице новостей читали бы её целиком.
+    """
+    if not hasattr(request, '_news_state'):
+        if 'pk' in kwargs:
+            request._news_state = News.objects.filter(
+                pk=kwargs['pk']
+            ).aggregate(latest=Max('date'), modified=Max('modified'))
+        else:
+            version = FeedVersion.current() or {}
+            request._news_state = {
+                'stamp': version.get('stamp'),
+                'modified': version.get('changed'),
+            }
+    return request._news_state
+
+
+def news_etag(request, *args, **kwargs):
+    state = page_state(request, **kwargs)
+    if state['modified'] is None:
+        return None
+    # Для вошедших пользователей страница своя: имя в шапке, форма, ссылки.
+    # В форме лежит токен CSRF, который меняется при каждом входе.
+    csrf = (
+        request.META.get('CSRF_COOKIE')
+        if request.user.is_authenticated else None
+    )
+    key = '{}:{}:{}:{}'.format(
+        sorted(state.items()), request.user.pk, csrf, request.get_full_path()
+    )
+    return md5(key.encode()).hexdigest()
+
+
+def news_last_modified(request, *args, **kwargs):
+    # Вход и выход не меняют дату, поэтому вошедшим хватает ETag.
+    if request.user.is_authenticated:
+        return None
+    return page_state(request, **kwargs)['modified']
+
+
+conditional_news_page = method_decorator(
+    condition(etag_func=news_etag, last_modified_func=news_last_modified),
+    name='dispatch'
+)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from news.models import Comment, News
+from news.search import clear_index, index_rows
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс новостей и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using, batch_size = options['database'], options['batch_size']
+        with transaction.atomic(using):
+            clear_index(using)
+            indexed = index_rows(
+                News.objects.using(using).values_list('id', 'title', 'text')
+                .iterator(batch_size),
+                Comment.objects.using(using).values_list('id', 'text')
+                .iterator(batch_size),
+                using,
+                batch_size,
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано записей: {indexed}')
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from news.models import Comment, render_comment
+
+
+class Command(BaseCommand):
+    help = 'Заполняет готовый HTML комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить HTML и у уже обработанных комментариев.',
+        )
+
+    def handle(self, *args, **options):
+        using, batch_size = options['database'], options['batch_size']
+        comments = Comment.objects.using(using)
+        if not options['all']:
+            comments = comments.filter(text_html='')
+        comments = comments.only('id', 'text').order_by('id')
+        rendered = last_id = 0
+        # Пачки идут по ключу id: каждая читается отдельным запросом,
+        # поэтому курсор чтения не остаётся открытым во время записи.
+        while True:
+            batch = list(comments.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            for comment in batch:
+                comment.text_html = render_comment(comment.text)
+            Comment.objects.using(using).bulk_update(batch, ['text_html'])
+            rendered += len(batch)
+            last_id = batch[-1].id
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано комментариев: {rendered}')
+        )
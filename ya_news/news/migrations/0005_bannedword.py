@@ -0,0 +1,49 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:58
+
+from django.db import migrations, models
+import uuid
+
+
+BAD_WORDS = (
+    'редиска',
+    'негодяй',
+)
+
+
+def add_bad_words(apps, schema_editor):
+    BannedWord = apps.get_model('news', 'BannedWord')
+    ModerationVersion = apps.get_model('news', 'ModerationVersion')
+    BannedWord.objects.bulk_create(
+        BannedWord(word=word) for word in BAD_WORDS
+    )
+    ModerationVersion.objects.create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_comment_news_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BannedWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=100, unique=True, verbose_name='Слово')),
+            ],
+            options={
+                'verbose_name': 'Запрещённое слово',
+                'verbose_name_plural': 'Запрещённые слова',
+                'ordering': ('word',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ModerationVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stamp', models.UUIDField(default=uuid.uuid4)),
+            ],
+        ),
+        migrations.RunPython(add_bad_words, migrations.RunPython.noop),
+    ]
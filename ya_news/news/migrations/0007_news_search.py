@@ -0,0 +1,105 @@
+import re
+from itertools import chain, islice
+
+from django.db import migrations
+
+# Стеммер — отдельный алгоритм без моделей и настроек; раскладку индекса
+# миграция описывает сама и от news.search не зависит.
+from news.stemmer import stem
+
+BATCH_SIZE = 1000
+WORD_RE = re.compile(r'\w+')
+STATEMENTS = {
+    # Слова хранятся уже приведёнными к основам, поэтому таблица хранит
+    # свою копию текста, а не ссылается на news_news.
+    'sqlite': (
+        (
+            'CREATE VIRTUAL TABLE news_search USING fts5('
+            "title, body, tokenize='unicode61 remove_diacritics 2')",
+        ),
+        ('DROP TABLE news_search',),
+    ),
+    'postgresql': (
+        (
+            'CREATE TABLE news_search '
+            '(id bigint PRIMARY KEY, document tsvector NOT NULL)',
+            'CREATE INDEX news_search_document_idx ON news_search '
+            'USING GIN (document)',
+        ),
+        ('DROP TABLE news_search',),
+    ),
+}
+
+
+# Строка индекса новости имеет номер id * 2, комментария — id * 2 + 1.
+POSTGRESQL_FILL = """
+    INSERT INTO news_search(id, document)
+    SELECT id * 2,
+        setweight(to_tsvector('russian', title), 'A')
+        || setweight(to_tsvector('russian', text), 'B')
+    FROM news_news
+    UNION ALL
+    SELECT id * 2 + 1, setweight(to_tsvector('russian', text), 'B')
+    FROM news_comment
+"""
+SQLITE_FILL = (
+    'INSERT INTO news_search(rowid, title, body) VALUES (%s, %s, %s)'
+)
+
+
+def stem_text(text):
+    return ' '.join(stem(word) for word in WORD_RE.findall(text))
+
+
+def fill_sqlite(apps, schema_editor):
+    using = schema_editor.connection.alias
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    rows = chain(
+        (
+            (pk * 2, stem_text(title), stem_text(text))
+            for pk, title, text in News.objects.using(using)
+            .values_list('id', 'title', 'text').iterator(BATCH_SIZE)
+        ),
+        (
+            (pk * 2 + 1, '', stem_text(text))
+            for pk, text in Comment.objects.using(using)
+            .values_list('id', 'text').iterator(BATCH_SIZE)
+        ),
+    )
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                return
+            cursor.executemany(SQLITE_FILL, batch)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = STATEMENTS.get(vendor)
+    if not statements:
+        return
+    for sql in statements[0]:
+        schema_editor.execute(sql)
+    if vendor == 'sqlite':
+        fill_sqlite(apps, schema_editor)
+    else:
+        schema_editor.execute(POSTGRESQL_FILL)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    for sql in statements[1] if statements else ():
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
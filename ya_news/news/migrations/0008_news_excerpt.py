@@ -0,0 +1,38 @@
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+# Копия news.models.make_excerpt: миграция не должна зависеть от модели.
+EXCERPT_WORDS = 15
+EXCERPT_LENGTH = 255
+
+
+def fill_excerpts(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    news_list = News.objects.using(schema_editor.connection.alias)
+    batch = []
+    for news in news_list.only('id', 'text').iterator(BATCH_SIZE):
+        news.excerpt = Truncator(
+            Truncator(news.text).words(EXCERPT_WORDS)
+        ).chars(EXCERPT_LENGTH)
+        batch.append(news)
+        if len(batch) == BATCH_SIZE:
+            news_list.bulk_update(batch, ['excerpt'])
+            batch = []
+    news_list.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_news_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
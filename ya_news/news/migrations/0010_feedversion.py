@@ -0,0 +1,29 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:14
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+def create_feed_version(apps, schema_editor):
+    FeedVersion = apps.get_model('news', 'FeedVersion')
+    FeedVersion.objects.using(schema_editor.connection.alias).create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_comment_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stamp', models.UUIDField(default=uuid.uuid4)),
+                ('changed', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_feed_version, migrations.RunPython.noop),
+    ]
@@ -1,22 +1,106 @@
+import uuid
 from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.template.defaultfilters import linebreaksbr
+from django.utils import timezone
+from django.utils.text import Truncator
+
+# Начало текста для списков: столько слов и не больше EXCERPT_LENGTH знаков.
+EXCERPT_WORDS = 15
+EXCERPT_LENGTH = 255
+
+
+def make_excerpt(text):
+    return Truncator(Truncator(text).words(EXCERPT_WORDS)).chars(
+        EXCERPT_LENGTH
+    )
+
+
+def render_comment(text):
+    """HTML комментария: текст экранирован, переводы строк — <br>."""
+    return linebreaksbr(text, autoescape=True)
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create не вызывает save(), поэтому анонс заполняем здесь."""
+        objs = list(objs)
+        for news in objs:
+            news.excerpt = make_excerpt(news.text)
+        created = super().bulk_create(objs, *args, **kwargs)
+        # Сигналы post_save не отправляются, версию ленты меняем сами.
+        FeedVersion.bump()
+        return created
+
+    def shift_comment_count(self, delta):
+        """Атомарно сдвигает счётчик комментариев на delta."""
+        return self.update(
+            comment_count=F('comment_count') + delta,
+            modified=timezone.now()
+        )
+
+    def touch(self):
+        """Отмечает, что комментарии новости изменились."""
+        return self.update(modified=timezone.now())
+
+    def recount_comments(self):
+        """Пересчитывает счётчик комментариев по таблице Comment."""
+        comments = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(total=Count('pk')).values('total')
+        updated = self.update(
+            comment_count=Coalesce(Subquery(comments), 0),
+            modified=timezone.now()
+        )
+        FeedVersion.bump()
+        return updated
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
+    excerpt = models.CharField(
+        max_length=EXCERPT_LENGTH, default='', editable=False
+    )
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    modified = models.DateTimeField(auto_now=True)
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('date', 'id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.excerpt = make_excerpt(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create не вызывает save(), поэтому HTML заполняем здесь."""
+        objs = list(objs)
+        for comment in objs:
+            comment.text_html = render_comment(comment.text)
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -28,10 +112,83 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     text = models.TextField()
+    # Готовый к выводу HTML текста, чтобы не экранировать его при каждом
+    # показе ленты. Пустой у комментариев, ещё не обработанных командой
+    # render_comments, — тогда шаблон строит HTML сам.
+    text_html = models.TextField(default='', editable=False)
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    def save(self, *args, **kwargs):
+        self.text_html = render_comment(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_html'}
+        super().save(*args, **kwargs)
+
+
+class BannedWord(models.Model):
+    word = models.CharField('Слово', max_length=100, unique=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name = 'Запрещённое слово'
+        verbose_name_plural = 'Запрещённые слова'
+
+    def __str__(self):
+        return self.word
+
+
+class ModerationVersion(models.Model):
+    """
+    Версия словаря запрещённых слов.
+
+    Единственная строка таблицы получает новую метку при любой правке
+    словаря, по ней процессы понимают, что пора пересобрать проверку.
+    """
+    stamp = models.UUIDField(default=uuid.uuid4)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.values_list('stamp', flat=True).first()
+
+    @classmethod
+    def bump(cls):
+        cls.objects.update_or_create(pk=1, defaults={'stamp': uuid.uuid4()})
+
+
+class FeedVersion(models.Model):
+    """
+    Версия ленты новостей.
+
+    Единственная строка меняется при любом изменении новостей и их
+    комментариев. По ней лента отвечает на условные запросы, не читая
+    таблицу новостей. Цена — общая строка в каждой транзакции записи:
+    в PostgreSQL блокировка строки выстраивает пишущих комментарии друг
+    за другом до конца транзакции, поэтому транзакции записи держим
+    короткими.
+    """
+    stamp = models.UUIDField(default=uuid.uuid4)
+    changed = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.filter(pk=1).values('stamp', 'changed').first()
+
+    @classmethod
+    def bump(cls):
+        values = {'stamp': uuid.uuid4(), 'changed': timezone.now()}
+        if not cls.objects.filter(pk=1).update(**values):
+            cls.objects.create(pk=1, **values)
@@ -0,0 +1,111 @@
+import re
+import threading
+from functools import lru_cache
+
+from .models import BannedWord, ModerationVersion
+from .stemmer import stem
+
+# Латинские буквы и цифры, которыми подменяют похожие кириллические.
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'u': 'и', 'n': 'п',
+    '0': 'о', '3': 'з', '4': 'ч', '6': 'б', '@': 'а', 'ё': 'е',
+})
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Приводит текст к нижнему регистру и заменяет латинские двойники."""
+    return text.lower().translate(HOMOGLYPHS)
+
+
+@lru_cache(maxsize=10_000)
+def _stem(word):
+    return stem(word)
+
+
+def _trie_pattern(node):
+    """
+    Собирает регулярное выражение из префиксного дерева.
+
+    Общие префиксы основ попадают в выражение один раз, поэтому проверка
+    слова не перебирает весь список. Если одна основа является началом
+    другой, более длинная не нужна: выражение лишь отбирает слова,
+    которые вообще могут дать запрещённую основу.
+    """
+    if '' in node:
+        return ''
+    alternatives = [
+        re.escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+    ]
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return '(?:' + '|'.join(alternatives) + ')'
+
+
+class BadWordMatcher:
+    """
+    Запрещённые слова и фразы словаря, приведённые к основам.
+
+    Стеммер отрезает только окончания, поэтому слово может дать
+    запрещённую основу, лишь если с неё начинается. Такие слова отбирает
+    одно скомпилированное выражение, а к основе приводятся только они,
+    каждое различное слово — один раз. Основы сравниваются целиком:
+    «сука» не находится ни в «барсуке», ни в «сукне». Текст перед
+    поиском нормализуется, чтобы не помогала подмена букв латиницей.
+    """
+
+    def __init__(self, words):
+        # Фразы по основе первого слова.
+        self.phrases = {}
+        trie = {}
+        for word in words:
+            phrase = tuple(
+                _stem(token) for token in WORD_RE.findall(normalize(word))
+            )
+            if not phrase:
+                continue
+            self.phrases.setdefault(phrase[0], set()).add(phrase)
+            for word_stem in phrase:
+                node = trie
+                for char in word_stem:
+                    node = node.setdefault(char, {})
+                node[''] = {}
+        self.candidate = re.compile(_trie_pattern(trie)) if trie else None
+
+    def search(self, text):
+        """Возвращает основы первого найденного запрещённого слова или None."""
+        if self.candidate is None:
+            return None
+        tokens = WORD_RE.findall(normalize(text))
+        stems = [
+            _stem(token) if self.candidate.match(token) else None
+            for token in tokens
+        ]
+        for index, word_stem in enumerate(stems):
+            for phrase in self.phrases.get(word_stem, ()):
+                if tuple(stems[index:index + len(phrase)]) == phrase:
+                    return ' '.join(phrase)
+        return None
+
+
+_cached = (object(), None)
+_lock = threading.Lock()
+
+
+def get_bad_words_matcher():
+    """
+    Проверка для текущей версии словаря из базы.
+
+    На каждый вызов читаем только метку версии, а сам словарь загружаем
+    и компилируем заново лишь после её смены.
+    """
+    global _cached
+    stamp = ModerationVersion.current()
+    if _cached[0] != stamp:
+        with _lock:
+            if _cached[0] != stamp:
+                words = BannedWord.objects.values_list('word', flat=True)
+                _cached = (stamp, BadWordMatcher(words))
+    return _cached[1]
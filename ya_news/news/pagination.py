@@ -0,0 +1,80 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа в непрозрачный токен."""
+    raw = json.dumps([str(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, fields):
+    """
+    Распаковывает токен и приводит значения к типам полей модели.
+
+    Для испорченного токена возвращаем 404, как и для несуществующей
+    страницы.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise Http404('Некорректный курсор.')
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise Http404('Некорректный курсор.')
+    try:
+        return [
+            field.to_python(value) for field, value in zip(fields, values)
+        ]
+    except ValidationError:
+        raise Http404('Некорректный курсор.')
+
+
+def keyset_filter(ordering, values):
+    """
+    Условие «строго после» для лексикографического порядка ordering.
+
+    Для ('-date', '-id') и значений (d, i) получаем
+    date < d OR (date = d AND id < i).
+    """
+    condition = Q()
+    for index in reversed(range(len(ordering))):
+        name = ordering[index].lstrip('-')
+        lookup = 'lt' if ordering[index].startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[index]})
+        if index < len(ordering) - 1:
+            step |= Q(**{name: values[index]}) & condition
+        condition = step
+    return condition
+
+
+def paginate_keyset(queryset, ordering, cursor, per_page):
+    """
+    Возвращает страницу queryset после cursor и токен следующей страницы.
+
+    Вместо OFFSET фильтруем по последнему ключу предыдущей страницы, поэтому
+    стоимость запроса не зависит от номера страницы. Элементами страницы
+    могут быть как объекты моделей, так и словари из values().
+    """
+    names = [name.lstrip('-') for name in ordering]
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        fields = [queryset.model._meta.get_field(name) for name in names]
+        queryset = queryset.filter(
+            keyset_filter(ordering, decode_cursor(cursor, fields))
+        )
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor(
+            last[name] if isinstance(last, dict) else getattr(last, name)
+            for name in names
+        )
+    return items, next_cursor
@@ -1,8 +1,24 @@
+import asyncio
+import json
+from http import HTTPStatus
+from io import StringIO
+
 import pytest
 
+from asgiref.sync import async_to_sync
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connection
+from django.middleware.csrf import _get_new_csrf_token
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from news.cache import page_cache_stats
+from news.models import Comment, FeedVersion, News
+from news.views import NewsDetailView, NewsList
+from yanews.async_views import read_view
+
 
 @pytest.mark.django_db
 def test_news_count(client, news_more):
@@ -24,6 +40,44 @@ def test_news_order(client, news_more):
     assert sorted_dates == all_dates
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ('news:home', 'news:archive'))
+def test_feed_shows_excerpt_without_text(client, name):
+    ''' Проверяем, что лента выводит анонс и не читает полный текст '''
+    News.objects.create(title='Длинная', text='слово ' * 1000)
+    response = client.get(reverse(name))
+    news = response.context['object_list'][0]
+    assert 'text' in news.get_deferred_fields()
+    assert news.excerpt == ('слово ' * 15).strip() + '…'
+    assert news.excerpt in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_archive_pages_cover_all_news(client, news_more):
+    ''' Проверяем, что архив по курсору отдаёт все новости по порядку '''
+    url = reverse('news:archive')
+    seen = []
+    cursor = None
+    while True:
+        response = client.get(url, {'cursor': cursor} if cursor else None)
+        object_list = response.context['object_list']
+        assert len(object_list) <= settings.NEWS_COUNT_ON_HOME_PAGE
+        seen.extend(object_list)
+        cursor = response.context['next_cursor']
+        if cursor is None:
+            break
+    assert [news.pk for news in seen] == list(
+        News.objects.order_by('-date', '-id').values_list('pk', flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_archive_rejects_broken_cursor(client):
+    ''' Проверяем ответ на испорченный курсор '''
+    response = client.get(reverse('news:archive'), {'cursor': 'сломан'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 @pytest.mark.django_db
 def test_comments_order(client, news_detail_url, comments_more):
     ''' Проверяем сортировку комментариев '''
@@ -34,6 +88,32 @@ def test_comments_order(client, news_detail_url, comments_more):
     assert all_comments[0].created < all_comments[1].created
 
 
+@pytest.mark.django_db
+def test_comment_thread_is_paginated(
+    client, settings, news, author, news_detail_url
+):
+    ''' Проверяем, что лента комментариев отдаётся страницами '''
+    settings.COMMENTS_COUNT_ON_PAGE = 2
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(5)
+    )
+    response = client.get(news_detail_url)
+    comments = list(response.context['comments'])
+    cursor = response.context['next_cursor']
+    assert len(comments) == settings.COMMENTS_COUNT_ON_PAGE
+    url = reverse('news:comments', args=(news.id,))
+    while cursor:
+        response = client.get(url, {'cursor': cursor})
+        comments.extend(response.context['comments'])
+        cursor = response.context['next_cursor']
+    assert [comment.pk for comment in comments] == list(
+        news.comment_set.order_by('created', 'id').values_list(
+            'pk', flat=True
+        )
+    )
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     'parametrized_client, form_in_list',
@@ -59,3 +139,207 @@ def test_edit_note_page_contains_form(id_for_comment_args, author_client):
     url = reverse('news:edit', args=id_for_comment_args)
     response = author_client.get(url)
     assert 'form' in response.context
+
+
+@pytest.mark.django_db
+def test_anonymous_page_is_served_from_cache(client, news_detail_url):
+    ''' Проверяем, что повторный запрос анонима отдаётся из кэша '''
+    hits = page_cache_stats.snapshot()['hits']
+    first = client.get(news_detail_url)
+    second = client.get(news_detail_url)
+    assert second.context is None
+    assert second.content == first.content
+    assert page_cache_stats.snapshot()['hits'] == hits + 1
+
+
+@pytest.mark.django_db
+def test_page_cache_is_invalidated_by_new_comment(
+    client, news, author, news_detail_url
+):
+    ''' Проверяем сброс кэша страницы при новом комментарии '''
+    client.get(news_detail_url)
+    Comment.objects.create(news=news, author=author, text='Свежий')
+    response = client.get(news_detail_url)
+    assert 'Свежий' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_page_cache_follows_version_in_database(client, news):
+    ''' Проверяем, что кэш сбрасывает смена версии в базе, без сигналов '''
+    url = reverse('news:home')
+    client.get(url)
+    # Так ленту видит процесс, чей кэш не знал об изменении.
+    News.objects.update(title='Заголовок из другого процесса')
+    assert 'другого процесса' not in client.get(url).content.decode()
+    FeedVersion.bump()
+    assert 'другого процесса' in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_cached_thread_shows_links_only_to_author(
+    author_client, admin_client, comment, news_detail_url
+):
+    ''' Проверяем ссылки автора в общей закэшированной ленте '''
+    edit_url = reverse('news:edit', args=(comment.id,))
+    assert edit_url in author_client.get(news_detail_url).content.decode()
+    assert edit_url not in admin_client.get(news_detail_url).content.decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ('news:home', 'news:archive'))
+def test_feed_supports_conditional_get(client, news, name):
+    ''' Проверяем ответ 304 на повторный запрос без изменений '''
+    url = reverse(name)
+    etag = client.get(url)['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_feed_validation_does_not_read_news(client, news):
+    ''' Проверяем, что ответ 304 ленты не читает таблицу новостей '''
+    url = reverse('news:home')
+    etag = client.get(url)['ETag']
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert len(captured) == 1
+    assert 'news_news' not in captured[0]['sql']
+    News.objects.bulk_create([News(title='Новая', text='Текст')])
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_new_comment_changes_etag(
+    author_client, news, news_detail_url, form_data
+):
+    ''' Проверяем, что новый комментарий меняет ETag страницы новости '''
+    etag = author_client.get(news_detail_url)['ETag']
+    author_client.post(news_detail_url, data=form_data)
+    response = author_client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_new_csrf_token_changes_etag(author_client, news_detail_url):
+    ''' Проверяем, что после нового входа форма не берётся из кэша '''
+    etag = author_client.get(news_detail_url)['ETag']
+    # Вход выдаёт новый токен CSRF, как rotate_token().
+    author_client.cookies[settings.CSRF_COOKIE_NAME] = _get_new_csrf_token()
+    response = author_client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_performance_instrumentation(settings, client, admin_client, news):
+    ''' Проверяем заголовок Server-Timing и гистограммы маршрута '''
+    settings.PERF_INSTRUMENTATION = True
+    response = client.get(reverse('news:home'))
+    assert 'db;dur=' in response['Server-Timing']
+    metrics = admin_client.get(reverse('metrics')).content.decode()
+    assert 'yanews_db_queries_count{route="news:home"}' in metrics
+
+
+@pytest.mark.django_db
+def test_search_finds_word_forms_in_news_and_comments(
+    client, news, comment, author
+):
+    ''' Поиск находит другие формы слова в новостях и комментариях '''
+    Comment.objects.create(news=news, author=author, text='Другая тема')
+    response = client.get(reverse('news:search'), {'q': 'новостями'})
+    results = response.context['object_list']
+    assert len(results) == 2
+    assert {'news': news} in results
+    assert {'news': news, 'comment': comment} in results
+
+
+@pytest.mark.django_db
+def test_search_pages_cover_all_results(client, settings, news_more):
+    ''' Страницы результатов поиска не теряют и не повторяют записи '''
+    settings.NEWS_SEARCH_RESULTS_ON_PAGE = 3
+    call_command('reindex_search', stdout=StringIO())
+    url = reverse('news:search')
+    params = {'q': 'текст'}
+    seen = []
+    while True:
+        response = client.get(url, params)
+        seen.extend(
+            result['news'].pk for result in response.context['object_list']
+        )
+        if not response.context['next_cursor']:
+            break
+        params['cursor'] = response.context['next_cursor']
+    assert sorted(seen) == sorted(news.pk for news in News.objects.all())
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('view_class', (NewsList, NewsDetailView))
+def test_async_read_views(settings, rf, news, comment, view_class):
+    ''' Асинхронная страница отдаёт уже нарисованный ответ '''
+    settings.ASYNC_VIEWS = True
+    view = read_view(view_class)
+    assert asyncio.iscoroutinefunction(view)
+    request = rf.get('/')
+    request.user = AnonymousUser()
+    response = async_to_sync(view)(request, pk=news.pk)
+    # Ответ нарисован в том же потоке, Django не нужен ещё один переход.
+    assert not hasattr(response, 'render')
+    content = response.content.decode()
+    assert news.title in content
+    if view_class is NewsDetailView:
+        assert comment.text_html in content
+
+
+def read_api(client, url, data=None):
+    response = client.get(url, data)
+    assert response['Content-Type'] == 'application/json'
+    return json.loads(b''.join(response.streaming_content))
+
+
+@pytest.mark.django_db
+def test_api_feed_pages_cover_all_news(client, news_more):
+    ''' Проверяем, что лента в JSON отдаёт все новости по порядку '''
+    url = reverse('news:api_feed')
+    seen = []
+    data = {'fields': 'id,title'}
+    while True:
+        page = read_api(client, url, data)
+        assert all(set(item) == {'id', 'title'} for item in page['results'])
+        seen.extend(item['id'] for item in page['results'])
+        if page['next'] is None:
+            break
+        data['cursor'] = page['next']
+    assert seen == list(
+        News.objects.order_by('-date', '-id').values_list('pk', flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_api_comments(client, news, comment, id_for_news_args):
+    ''' Проверяем комментарии новости в JSON и поля по умолчанию '''
+    url = reverse('news:api_comments', args=id_for_news_args)
+    page = read_api(client, url)
+    assert page['next'] is None
+    [item] = page['results']
+    assert item['id'] == comment.pk
+    assert item['author'] == comment.author.username
+    assert item['text'] == comment.text
+    assert set(item) == {'id', 'author', 'text', 'created'}
+
+
+@pytest.mark.django_db
+def test_api_rejects_unknown_fields(client, news):
+    ''' Проверяем ответ на неизвестное поле в fields= '''
+    response = client.get(reverse('news:api_feed'), {'fields': 'id,secret'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'secret' in response.json()['detail']
+
+
+@pytest.mark.django_db
+def test_api_rejects_broken_cursor(client, news):
+    ''' Проверяем ответ JSON на испорченный курсор '''
+    response = client.get(reverse('news:api_feed'), {'cursor': 'сломан'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response['Content-Type'] == 'application/json'
+    assert response.json()['detail'] == 'Некорректный курсор.'
@@ -1,12 +1,28 @@
+import asyncio
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
 
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
 from django.urls import reverse
 from pytest_django.asserts import assertFormError, assertRedirects
 
+from news import slow_queries
 from news.forms import WARNING
-from news.models import Comment
+from news.models import BannedWord, Comment, FeedVersion, News
+from news.moderation import BadWordMatcher, get_bad_words_matcher
+from news.search import COMMENT, NEWS, search
+from yanews.instrumentation import PerformanceMiddleware
+from yanews.routers import PrimaryReplicaRouter, ReplicaPinMiddleware
+
+# Признак плана в журнале: SQLite пишет SEARCH для поиска по индексу, а
+# PostgreSQL на маленькой тестовой таблице может выбрать и Seq Scan.
+PLAN_MARKERS = {'sqlite': 'SEARCH', 'postgresql': 'Scan'}
 
 
 def test_user_can_create_comment(
@@ -18,6 +34,7 @@ def test_user_can_create_comment(
     assert Comment.objects.count() == comment_initial_count + 1
     new_comment = Comment.objects.get()
     assert new_comment.text == form_data['text']
+    assert new_comment.news.comment_count == 1
 
 
 @pytest.mark.django_db
@@ -43,6 +60,68 @@ def test_user_cant_use_bad_words(
     assert Comment.objects.count() == comment_initial_count
 
 
+@pytest.mark.parametrize(
+    'text',
+    (
+        'Ну ты и редиской оказался',
+        'НЕГОДЯЯМИ их назвать мало',
+        'pедиcкa',
+    ),
+)
+def test_user_cant_use_bad_word_forms(
+        admin_client, text, news_detail_url, comment_initial_count
+):
+    ''' Проверяем блокировку словоформ и написания латиницей '''
+    response = admin_client.post(news_detail_url, data={'text': text})
+    assertFormError(response, 'form', 'text', errors=WARNING)
+    assert Comment.objects.count() == comment_initial_count
+
+
+def test_banned_word_added_in_admin_is_applied(
+        admin_client, news_detail_url, comment_initial_count
+):
+    ''' Проверяем, что новое слово из словаря сразу начинает работать '''
+    text = 'Какой же ты бармаглот'
+    admin_client.post(news_detail_url, data={'text': text})
+    assert Comment.objects.count() == comment_initial_count + 1
+    BannedWord.objects.create(word='Бармаглот')
+    response = admin_client.post(news_detail_url, data={'text': text})
+    assertFormError(response, 'form', 'text', errors=WARNING)
+    assert Comment.objects.count() == comment_initial_count + 1
+
+
+@pytest.mark.parametrize(
+    'text, found',
+    (
+        ('Вот сука', True),
+        ('С СУКОЙ не спорят', True),
+        ('Барсук вылез из норы', False),
+        ('Пальто из сукна', False),
+        ('Сукно', False),
+    ),
+)
+def test_bad_words_match_whole_words_only(text, found):
+    ''' Проверяем, что слово не находится внутри других слов '''
+    matcher = BadWordMatcher(['сука'])
+    assert bool(matcher.search(text)) is found
+
+
+def test_bad_phrase_matches_only_in_sequence():
+    ''' Проверяем, что фраза ловится только целиком и по порядку '''
+    matcher = BadWordMatcher(['старый хрыч'])
+    assert matcher.search('Ах ты старый старый хрыч!') == 'стар хрыч'
+    assert matcher.search('Хрыч, но не старый') is None
+
+
+@pytest.mark.django_db
+def test_bad_words_matcher_is_rebuilt_only_on_change():
+    ''' Проверяем, что проверка пересобирается только при смене версии '''
+    matcher = get_bad_words_matcher()
+    assert get_bad_words_matcher() is matcher
+    BannedWord.objects.create(word='бармаглот')
+    assert get_bad_words_matcher() is not matcher
+
+
 @pytest.mark.django_db
 def test_author_can_edit_comment(
         comment, author_client, form_data, news_detail_url
@@ -53,6 +132,19 @@ def test_author_can_edit_comment(
     assertRedirects(response, f'{news_detail_url}#comments')
     comment.refresh_from_db()
     assert comment.text == form_data['text']
+    assert comment.text_html == form_data['text']
+
+
+def test_comment_html_is_rendered_on_save(
+        author_client, comment, news_detail_url
+):
+    ''' Проверяем, что готовый HTML экранирован и выводится в ленте '''
+    url = reverse('news:edit', args=(comment.id,))
+    author_client.post(url, {'text': '<b>жирный</b>\nвторая строка'})
+    comment.refresh_from_db()
+    html = '&lt;b&gt;жирный&lt;/b&gt;<br>вторая строка'
+    assert comment.text_html == html
+    assert html in author_client.get(news_detail_url).content.decode()
 
 
 def test_user_cant_edit_comment_of_another_user(
@@ -75,6 +167,7 @@ def test_author_can_delete_comment(
     response = author_client.post(url)
     assertRedirects(response, f'{news_detail_url}#comments')
     assert Comment.objects.count() < comment_initial_count
+    assert News.objects.get().comment_count == 0
 
 
 def test_user_cant_delete_comment_of_another_user(
@@ -85,3 +178,195 @@ def test_user_cant_delete_comment_of_another_user(
     response = admin_client.post(url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Comment.objects.count() == comment_initial_count
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(news, comment):
+    ''' Проверяем пересчёт счётчика комментариев командой '''
+    News.objects.update(comment_count=42)
+    call_command('recount_comments')
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_news_fixture_loads():
+    ''' Проверяем, что фикстура новостей загружается в текущую схему '''
+    call_command('loaddata', 'news.json', verbosity=0)
+    assert News.objects.count() == 19
+    assert not News.objects.filter(modified__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_render_comments_command(comment):
+    ''' Проверяем заполнение HTML старых комментариев пачками '''
+    Comment.objects.update(text_html='')
+    out = StringIO()
+    call_command('render_comments', batch_size=1, stdout=out)
+    comment.refresh_from_db()
+    assert comment.text_html == comment.text
+    assert 'Обработано комментариев: 1' in out.getvalue()
+
+
+def test_comment_author_reads_from_primary(
+        admin_client, settings, form_data, news_detail_url
+):
+    ''' Проверяем, что после комментария клиент закреплён за основной базой '''
+    response = admin_client.post(news_detail_url, data=form_data)
+    assert settings.REPLICA_PIN_COOKIE in response.cookies
+
+
+def test_router_reads_from_replica_until_write(rf, settings):
+    ''' Проверяем выбор базы для чтения до и после записи '''
+    settings.DATABASES = {**settings.DATABASES, 'replica': {}}
+    router = PrimaryReplicaRouter()
+    routes = []
+
+    def view(request):
+        routes.append(router.db_for_read(News))
+        router.db_for_write(News)
+        routes.append(router.db_for_read(News))
+        return HttpResponse()
+
+    response = ReplicaPinMiddleware(view)(rf.get('/'))
+    assert routes == ['replica', 'default']
+    assert settings.REPLICA_PIN_COOKIE in response.cookies
+
+
+def test_replica_pin_in_async_chain(rf, settings):
+    ''' Проверяем, что запись в потоке асинхронной страницы закрепляет базу '''
+    @sync_to_async
+    def write():
+        PrimaryReplicaRouter().db_for_write(News)
+
+    async def view(request):
+        await write()
+        return HttpResponse()
+
+    middleware = ReplicaPinMiddleware(view)
+    assert asyncio.iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(rf.get('/'))
+    assert settings.REPLICA_PIN_COOKIE in response.cookies
+
+
+@pytest.fixture
+def warm_bad_words_matcher(db):
+    get_bad_words_matcher()
+
+
+# Сессия и пользователь — 2 запроса; SAVEPOINT и RELEASE — ещё 2.
+@pytest.mark.usefixtures('warm_bad_words_matcher')
+@pytest.mark.parametrize(
+    'name, method, expected_queries',
+    (
+        # Новость, версия словаря, INSERT, версия ленты, счётчик,
+        # поисковый индекс.
+        ('news:detail', 'post', 10),
+        # Комментарий вместе с новостью одним запросом.
+        ('news:edit', 'get', 3),
+        ('news:delete', 'get', 3),
+        # Комментарий, версия словаря, UPDATE, версия ленты, поисковый
+        # индекс, отметка у новости.
+        ('news:edit', 'post', 10),
+        # Комментарий, DELETE, версия ленты, счётчик, поисковый индекс.
+        ('news:delete', 'post', 9),
+    ),
+)
+def test_comment_write_paths_query_budget(
+        author_client, comment, form_data, django_assert_num_queries,
+        name, method, expected_queries
+):
+    ''' Проверяем число запросов к базе при работе с комментариями '''
+    pk = comment.news_id if name == 'news:detail' else comment.id
+    url = reverse(name, args=(pk,))
+    with django_assert_num_queries(expected_queries):
+        getattr(author_client, method)(url, data=form_data)
+
+
+@pytest.mark.django_db
+def test_slow_query_is_logged_with_plan(settings, caplog, monkeypatch, news):
+    ''' Медленный запрос попадает в журнал с планом и местом вызова '''
+    settings.SLOW_QUERY_MS = 0
+    settings.SLOW_QUERY_MAX_PER_MINUTE = 1
+    monkeypatch.setattr(
+        slow_queries, 'rate_limiter', slow_queries.RateLimiter()
+    )
+    with connection.execute_wrapper(slow_queries.log_slow_query):
+        News.objects.filter(pk=news.pk).first()
+        News.objects.count()
+    assert len(caplog.records) == 1
+    message = caplog.records[0].getMessage()
+    assert 'news_news' in message
+    assert 'test_logic.py' in message
+    plan = message.split('План:\n')[1]
+    assert PLAN_MARKERS[connection.vendor] in plan
+
+
+@pytest.mark.django_db
+def test_slow_query_log_survives_instrumentation(rf, settings, monkeypatch):
+    ''' Журнал не теряется, если соединение открылось посреди замера '''
+    settings.PERF_INSTRUMENTATION = True
+    settings.SLOW_QUERY_MS = 1000
+    monkeypatch.setattr(connection, 'execute_wrappers', [])
+
+    def view(request):
+        # Так выглядит новое соединение после закрытого в прошлом запросе.
+        connection_created.send(
+            sender=connection.__class__, connection=connection
+        )
+        News.objects.count()
+        return HttpResponse()
+
+    middleware = PerformanceMiddleware(view)
+    for _ in range(3):
+        middleware(rf.get('/'))
+    assert connection.execute_wrappers == [slow_queries.log_slow_query]
+
+
+def find(query):
+    hits, _ = search(query, None, 1000, 'default')
+    return sorted(hits)
+
+
+@pytest.mark.django_db
+def test_search_index_is_updated_incrementally(news, comment):
+    ''' Индекс следует за правкой и удалением новостей и комментариев '''
+    assert find('текстом') == [(NEWS, news.pk), (COMMENT, comment.pk)]
+    comment.text = 'Совсем о другом'
+    comment.save()
+    assert find('текст') == [(NEWS, news.pk)]
+    assert find('другой') == [(COMMENT, comment.pk)]
+    news.delete()
+    assert find('текст') == find('другой') == []
+
+
+@pytest.mark.django_db
+def test_news_delete_handles_comments_at_once(
+        news, author, django_assert_num_queries
+):
+    ''' Комментарии удаляемой новости не обрабатываются по одному '''
+    for index in range(50):
+        Comment.objects.create(news=news, author=author, text='Текст')
+    other = News.objects.create(title='Другая', text='Текст')
+    comment = Comment.objects.create(news=other, author=author, text='Текст')
+    version = FeedVersion.current()
+    # Комментарии: выборка и DELETE; новость: DELETE; версия ленты и
+    # индекс — по одному запросу на всю новость.
+    with django_assert_num_queries(5):
+        news.delete()
+    assert FeedVersion.current() != version
+    assert find('текст') == [(NEWS, other.pk), (COMMENT, comment.pk)]
+    comment.delete()
+    assert find('текст') == [(NEWS, other.pk)]
+    assert News.objects.get().comment_count == 0
+
+
+@pytest.mark.django_db
+def test_reindex_search_command(news_feed):
+    ''' Команда индексирует записи, созданные в обход сигналов '''
+    comment = Comment.objects.get(text='Комментарий 15')
+    news = News.objects.get(title='Новость 7')
+    assert find('комментарии 15') == []
+    call_command('reindex_search', batch_size=500, stdout=StringIO())
+    assert find('комментарии 15') == [(COMMENT, comment.pk)]
+    assert find('новости 7') == [(NEWS, news.pk)]
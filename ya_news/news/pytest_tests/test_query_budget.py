@@ -0,0 +1,83 @@
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news import urls
+from news.moderation import get_bad_words_matcher
+
+# Верхняя граница суммарного времени SQL на один запрос страницы, секунды.
+QUERY_TIME_BUDGET = 0.5
+
+# Запросы вошедшего пользователя: сессия и пользователь — всегда 2.
+QUERY_BUDGETS = {
+    # Отметки свежести, страница новостей.
+    'home': 4,
+    'archive': 4,
+    # Поисковый индекс, новости и комментарии с новостями.
+    'search': 5,
+    # Отметки свежести, новость, страница комментариев с авторами.
+    'detail': 5,
+    # Отметка изменения новости, страница комментариев с авторами.
+    'comments': 4,
+    # Комментарий вместе с новостью.
+    'edit': 3,
+    'delete': 3,
+    # Страница новостей через values(), без сессии.
+    'api_feed': 1,
+    # Проверка новости, страница комментариев с именами авторов.
+    'api_comments': 2,
+}
+
+
+def assert_query_budget(captured, budget, time_budget=QUERY_TIME_BUDGET):
+    """Проверяет число и время запросов, при превышении печатает их SQL."""
+    queries = captured.captured_queries
+    total_time = sum(float(query['time']) for query in queries)
+    if len(queries) <= budget and total_time <= time_budget:
+        return
+    listing = '\n'.join(
+        f'{index}. [{query["time"]}s] {query["sql"]}'
+        for index, query in enumerate(queries, start=1)
+    )
+    pytest.fail(
+        f'{len(queries)} запросов за {total_time:.3f}s при бюджете '
+        f'{budget} запросов и {time_budget}s:\n{listing}'
+    )
+
+
+def test_every_route_has_budget():
+    ''' Проверяем, что бюджет задан для каждого маршрута news.urls '''
+    names = {pattern.name for pattern in urls.urlpatterns}
+    assert names == set(QUERY_BUDGETS)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', sorted(QUERY_BUDGETS))
+def test_route_query_budget(author_client, news_feed, comment, name):
+    ''' Проверяем число и время запросов страниц на объёмных данных '''
+    get_bad_words_matcher()
+    if name == 'search':
+        call_command('reindex_search', stdout=StringIO())
+    args = {
+        'home': None,
+        'archive': None,
+        'search': None,
+        'detail': (news_feed.pk,),
+        'comments': (news_feed.pk,),
+        'edit': (comment.pk,),
+        'delete': (comment.pk,),
+        'api_feed': None,
+        'api_comments': (news_feed.pk,),
+    }[name]
+    url = reverse(f'news:{name}', args=args)
+    data = {'q': 'новость комментарий'} if name == 'search' else None
+    with CaptureQueriesContext(connection) as captured:
+        response = author_client.get(url, data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert_query_budget(captured, QUERY_BUDGETS[name])
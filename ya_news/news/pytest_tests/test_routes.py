@@ -11,10 +11,15 @@ from pytest_django.asserts import assertRedirects
     'name, args',
     (
         ('news:home', None),
+        ('news:archive', None),
+        ('news:search', None),
         ('users:login', None),
         ('users:logout', None),
         ('users:signup', None),
         ('news:detail', pytest.lazy_fixture('id_for_news_args')),
+        ('news:comments', pytest.lazy_fixture('id_for_news_args')),
+        ('news:api_feed', None),
+        ('news:api_comments', pytest.lazy_fixture('id_for_news_args')),
     ),
 )
 def test_pages_availability_for_anonymous_user(client, name, args):
@@ -59,3 +64,18 @@ def test_redirects(client, name, comment):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'parametrized_client, expected_status',
+    (
+        (pytest.lazy_fixture('client'), HTTPStatus.FORBIDDEN),
+        (pytest.lazy_fixture('author_client'), HTTPStatus.FORBIDDEN),
+        (pytest.lazy_fixture('admin_client'), HTTPStatus.OK),
+    ),
+)
+def test_metrics_availability(parametrized_client, expected_status):
+    ''' Проверяем, что метрики доступны только сотрудникам '''
+    response = parametrized_client.get(reverse('metrics'))
+    assert response.status_code == expected_status
@@ -0,0 +1,167 @@
+"""
+Полнотекстовый поиск по новостям и комментариям.
+
+Индекс — таблица news_search (миграция 0007_news_search): FTS5 в SQLite,
+tsvector с индексом GIN в PostgreSQL. Строка индекса новости имеет номер
+id * 2, комментария — id * 2 + 1. Сигналы обновляют индекс при каждом
+сохранении и удалении, команда reindex_search перестраивает его целиком.
+
+В SQLite слова приводятся к основам стеммером Snowball до записи в
+индекс и перед поиском, в PostgreSQL этим занимается словарь russian.
+"""
+import re
+from itertools import chain, islice
+
+from django.db import connections, models
+
+from .pagination import decode_cursor, encode_cursor
+from .stemmer import stem
+
+NEWS = 0
+COMMENT = 1
+WORD_RE = re.compile(r'\w+')
+# Поля для разбора курсора (ранг, номер строки индекса).
+CURSOR_FIELDS = (models.FloatField(), models.BigIntegerField())
+# Строк индекса на один DELETE: старые SQLite принимают до 999 параметров.
+DELETE_BATCH = 500
+
+SQLITE_UPSERT = (
+    'INSERT OR REPLACE INTO news_search(rowid, title, body) '
+    'VALUES (%s, %s, %s)'
+)
+POSTGRESQL_UPSERT = """
+    INSERT INTO news_search(id, document) VALUES (
+        %s,
+        setweight(to_tsvector('russian', %s), 'A')
+        || setweight(to_tsvector('russian', %s), 'B')
+    )
+    ON CONFLICT (id) DO UPDATE SET document = excluded.document
+"""
+# Ранг растёт к худшим совпадениям, как bm25 в FTS5.
+SQLITE_SEARCH = """
+    SELECT rowid, score FROM (
+        SELECT rowid, bm25(news_search, 10.0, 1.0) AS score
+        FROM news_search
+        WHERE news_search MATCH %s
+    )
+    WHERE {after}
+    ORDER BY score, rowid
+    LIMIT %s
+"""
+POSTGRESQL_SEARCH = """
+    SELECT id, score FROM (
+        SELECT id, (-ts_rank_cd(document, query))::float8 AS score
+        FROM news_search, plainto_tsquery('russian', %s) query
+        WHERE document @@ query
+    ) hits
+    WHERE {after}
+    ORDER BY score, id
+    LIMIT %s
+"""
+AFTER = 'score > %s OR (score = %s AND {id} > %s)'
+
+
+def stem_text(text):
+    """Основы слов текста через пробел."""
+    return ' '.join(stem(word) for word in WORD_RE.findall(text))
+
+
+def news_entry(news):
+    return news.pk * 2 + NEWS, news.title, news.text
+
+
+def comment_entry(comment):
+    return comment.pk * 2 + COMMENT, '', comment.text
+
+
+def index_entries(entries, using):
+    """Добавляет или заменяет строки индекса (номер, заголовок, текст)."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        sql = SQLITE_UPSERT
+        params = [
+            (rowid, stem_text(title), stem_text(body))
+            for rowid, title, body in entries
+        ]
+    elif connection.vendor == 'postgresql':
+        sql, params = POSTGRESQL_UPSERT, list(entries)
+    else:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def index_rows(news_rows, comment_rows, using, batch_size):
+    """
+    Записывает в индекс строки (id, title, text) новостей и (id, text)
+    комментариев пачками по batch_size; источник читается потоком.
+    """
+    entries = chain(
+        ((pk * 2 + NEWS, title, text) for pk, title, text in news_rows),
+        ((pk * 2 + COMMENT, '', text) for pk, text in comment_rows),
+    )
+    total = 0
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return total
+        index_entries(batch, using)
+        total += len(batch)
+
+
+def remove_entries(rowids, using):
+    connection = connections[using]
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    column = 'rowid' if connection.vendor == 'sqlite' else 'id'
+    rowids = list(rowids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rowids), DELETE_BATCH):
+            batch = rowids[start:start + DELETE_BATCH]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM news_search WHERE {column} IN ({placeholders})',
+                batch,
+            )
+
+
+def clear_index(using):
+    connection = connections[using]
+    if connection.vendor in ('sqlite', 'postgresql'):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM news_search')
+
+
+def search(query, cursor, per_page, using):
+    """
+    Страница результатов после cursor и токен следующей страницы.
+
+    Результаты — пары (вид, id): вид NEWS или COMMENT. Страницы идут по
+    ключу (ранг, номер строки индекса), поэтому без OFFSET.
+    """
+    connection = connections[using]
+    words = WORD_RE.findall(query)
+    if not words or connection.vendor not in ('sqlite', 'postgresql'):
+        return [], None
+    if connection.vendor == 'sqlite':
+        sql, column = SQLITE_SEARCH, 'rowid'
+        match = ' '.join(f'"{stem(word)}"' for word in words)
+    else:
+        sql, column = POSTGRESQL_SEARCH, 'id'
+        match = ' '.join(words)
+    after, params = '1 = 1', []
+    if cursor:
+        after = AFTER.format(id=column)
+        rank, rowid = decode_cursor(cursor, CURSOR_FIELDS)
+        params = [rank, rank, rowid]
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(
+            sql.format(after=after), [match, *params, per_page + 1]
+        )
+        rows = db_cursor.fetchall()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        rowid, rank = rows[-1]
+        next_cursor = encode_cursor((rank, rowid))
+    return [(rowid % 2, rowid // 2) for rowid, _ in rows], next_cursor
@@ -0,0 +1,84 @@
+import threading
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import (BannedWord, Comment, FeedVersion, ModerationVersion,
+                     News)
+from .search import comment_entry, index_entries, news_entry, remove_entries
+
+# Новости, которые сейчас удаляются вместе с комментариями: id новости и
+# строки индекса её комментариев, которые нужно удалить.
+_local = threading.local()
+
+
+def _cascade():
+    if not hasattr(_local, 'cascade'):
+        _local.cascade = {}
+    return _local.cascade
+
+
+@receiver((post_save, post_delete), sender=BannedWord)
+def bump_moderation_version(sender, **kwargs):
+    """Любая правка словаря меняет его версию."""
+    ModerationVersion.bump()
+
+
+@receiver((post_save, post_delete), sender=News)
+def invalidate_news_pages(sender, instance, **kwargs):
+    # Страница самой новости следует за News.modified.
+    FeedVersion.bump()
+
+
+@receiver(pre_delete, sender=News)
+def start_news_delete(sender, instance, **kwargs):
+    """
+    Комментарии удаляемой новости обрабатываются вместе с ней.
+
+    Без этого каждый комментарий каскада сдвигал бы версию ленты, счётчик
+    и индекс своей новости, хотя она удаляется целиком. Если удаление
+    откатится, запись останется в потоке, и комментарии этой новости,
+    удалённые потом по одному, не сдвинут счётчик и индекс; их поправят
+    recount_comments и reindex_search.
+    """
+    _cascade()[instance.pk] = []
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    FeedVersion.bump()
+    # Версия страницы новости и её ленты комментариев — News.modified;
+    # сдвиг счётчика ставит её тем же UPDATE.
+    news = News.objects.filter(pk=instance.news_id)
+    if created:
+        news.shift_comment_count(1)
+    else:
+        news.touch()
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, using, **kwargs):
+    rowid = comment_entry(instance)[0]
+    cascade = _cascade().get(instance.news_id)
+    if cascade is not None:
+        cascade.append(rowid)
+        return
+    FeedVersion.bump()
+    News.objects.filter(pk=instance.news_id).shift_comment_count(-1)
+    remove_entries((rowid,), using)
+
+
+@receiver(post_save, sender=News)
+def index_news(sender, instance, using, **kwargs):
+    index_entries((news_entry(instance),), using)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, using, **kwargs):
+    index_entries((comment_entry(instance),), using)
+
+
+@receiver(post_delete, sender=News)
+def unindex_news(sender, instance, using, **kwargs):
+    comments = _cascade().pop(instance.pk, [])
+    remove_entries((news_entry(instance)[0], *comments), using)
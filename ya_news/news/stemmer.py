@@ -0,0 +1,122 @@
+"""
+Стеммер для русского языка по алгоритму Snowball.
+
+Описание алгоритма:
+https://snowballstem.org/algorithms/russian/stemmer.html
+"""
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им',
+    'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая',
+    'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ('ся', 'сь')
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+        'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+        'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+        'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и',
+    'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о',
+    'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+
+def _region(word, start):
+    """Позиция после первой согласной, следующей за гласной."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _strip(rv, endings, after_a=()):
+    """
+    Отрезает самое длинное окончание из endings или after_a.
+
+    Окончания из after_a отрезаются, только если перед ними стоит «а» или «я»
+    внутри RV. Если окончание не найдено, возвращает None.
+    """
+    matches = [
+        (len(ending), ending in after_a)
+        for ending in (*endings, *after_a)
+        if rv.endswith(ending)
+    ]
+    if not matches:
+        return None
+    length, needs_a = max(matches)
+    if needs_a and (len(rv) == length or rv[-length - 1] not in 'ая'):
+        return None
+    return rv[:-length]
+
+
+def _strip_inflection(rv):
+    """Шаг 1: деепричастие либо возвратность и одно из окончаний."""
+    stripped = _strip(rv, PERFECTIVE_GERUND[1], PERFECTIVE_GERUND[0])
+    if stripped is not None:
+        return stripped
+    stripped = _strip(rv, REFLEXIVE)
+    if stripped is not None:
+        rv = stripped
+    stripped = _strip(rv, ADJECTIVE)
+    if stripped is not None:
+        participle = _strip(stripped, PARTICIPLE[1], PARTICIPLE[0])
+        return stripped if participle is None else participle
+    for endings in (VERB[1], NOUN):
+        after_a = VERB[0] if endings is VERB[1] else ()
+        stripped = _strip(rv, endings, after_a)
+        if stripped is not None:
+            return stripped
+    return rv
+
+
+def _tidy_up(rv):
+    """Шаг 4: удвоенная «н», превосходная степень и мягкий знак."""
+    stripped = _strip(rv, SUPERLATIVE)
+    if stripped is not None:
+        rv = stripped
+    if rv.endswith('нн'):
+        return rv[:-1]
+    if stripped is None and rv.endswith('ь'):
+        return rv[:-1]
+    return rv
+
+
+def stem(word):
+    """Возвращает основу слова в нижнем регистре."""
+    word = word.lower().replace('ё', 'е')
+    rv_start = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word)
+    )
+    r2_start = _region(word, _region(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+    rv = _strip_inflection(rv)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    for ending in DERIVATIONAL:
+        if (
+            rv.endswith(ending)
+            and len(prefix) + len(rv) - len(ending) >= r2_start
+        ):
+            rv = rv[:-len(ending)]
+            break
+    return prefix + _tidy_up(rv)
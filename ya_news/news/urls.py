@@ -1,11 +1,25 @@
 from django.urls import path
 from news import views
+from yanews.async_views import read_view
 
 app_name = 'news'
 
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', read_view(views.NewsList), name='home'),
+    path('archive/', views.NewsArchive.as_view(), name='archive'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', read_view(views.NewsDetailView), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
+    path('api/news/', views.NewsFeedApi.as_view(), name='api_feed'),
+    path(
+        'api/news/<int:pk>/comments/',
+        views.NewsCommentsApi.as_view(),
+        name='api_comments'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
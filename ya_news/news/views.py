@@ -1,14 +1,26 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.db import router, transaction
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
 from django.urls import reverse
 from django.views import generic
 
+from .api import (COMMENT_DEFAULT, COMMENT_FIELDS, FEED_DEFAULT, FEED_FIELDS,
+                  page_response)
+from .cache import AnonymousPageCacheMixin, add_comment_actions, thread_key
+from .conditional import conditional_news_page
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import paginate_keyset
+from .search import COMMENT, NEWS, search
 
 
-class NewsList(generic.ListView):
+@conditional_news_page
+class NewsList(AnonymousPageCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
@@ -17,33 +29,159 @@ class NewsList(generic.ListView):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество определяется в настройках проекта. Полный текст
+        не читается: в списке выводится анонс excerpt.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.defer('text')[
+            :settings.NEWS_COUNT_ON_HOME_PAGE
+        ]
 
 
-class NewsDetail(generic.DetailView):
+@conditional_news_page
+class NewsArchive(AnonymousPageCacheMixin, generic.ListView):
+    """
+    Архив новостей с постраничной навигацией по курсору.
+
+    Страницы листаются по ключу (date, id), поэтому дальняя страница
+    стоит столько же, сколько первая.
+    """
+    model = News
+    template_name = 'news/archive.html'
+    ordering = ('-date', '-id')
+
+    def get_queryset(self):
+        object_list, self.next_cursor = paginate_keyset(
+            self.model.objects.defer('text'),
+            self.ordering,
+            self.request.GET.get('cursor'),
+            settings.NEWS_COUNT_ON_HOME_PAGE,
+        )
+        return object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        return context
+
+
+class NewsSearch(generic.ListView):
+    """
+    Поиск по новостям и комментариям.
+
+    Для найденного комментария выводится новость, к которой он оставлен.
+    """
+    template_name = 'news/search.html'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        hits, self.next_cursor = search(
+            self.query,
+            self.request.GET.get('cursor'),
+            settings.NEWS_SEARCH_RESULTS_ON_PAGE,
+            router.db_for_read(News),
+        )
+        news = News.objects.defer('text').in_bulk(
+            [pk for kind, pk in hits if kind == NEWS]
+        )
+        comments = Comment.objects.select_related('news').defer(
+            'news__text'
+        ).in_bulk(
+            [pk for kind, pk in hits if kind == COMMENT]
+        )
+        results = []
+        for kind, pk in hits:
+            if kind == NEWS and pk in news:
+                results.append({'news': news[pk]})
+            elif kind == COMMENT and pk in comments:
+                comment = comments[pk]
+                results.append({'news': comment.news, 'comment': comment})
+        return results
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            query=self.query, next_cursor=self.next_cursor, **kwargs
+        )
+
+
+class CommentThreadMixin:
+    """
+    Страница ленты комментариев новости.
+
+    HTML ленты кэшируется один на всех пользователей до следующего
+    изменения комментариев новости, ссылки автора добавляются после.
+    """
+    comment_ordering = ('created', 'id')
+
+    def render_comment_page(self, news_id, cursor):
+        comments, next_cursor = paginate_keyset(
+            Comment.objects.filter(news_id=news_id).select_related('author'),
+            self.comment_ordering,
+            cursor,
+            settings.COMMENTS_COUNT_ON_PAGE,
+        )
+        html = render_to_string('news/comments.html', {
+            'news_id': news_id,
+            'comments': comments,
+            'next_cursor': next_cursor,
+            'first_page': not cursor,
+        })
+        return html, next_cursor
+
+    def get_comment_thread(self, news_id, modified):
+        cursor = self.request.GET.get('cursor')
+        key = thread_key(news_id, modified, cursor)
+        page = cache.get(key)
+        if page is None:
+            page = self.render_comment_page(news_id, cursor)
+            cache.set(key, page, settings.NEWS_THREAD_CACHE_TIMEOUT)
+        html, next_cursor = page
+        return {
+            'comment_thread': add_comment_actions(html, self.request.user),
+            'next_cursor': next_cursor,
+        }
+
+
+@conditional_news_page
+class NewsDetail(
+        AnonymousPageCacheMixin, CommentThreadMixin, generic.DetailView
+):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(
+            self.get_comment_thread(self.object.pk, self.object.modified)
+        )
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsComments(
+        AnonymousPageCacheMixin, CommentThreadMixin, generic.View
+):
+    """
+    Следующая страница комментариев новости.
+
+    Отдаёт HTML-фрагмент, который страница новости подгружает по кнопке.
+    """
+
+    def get(self, request, *args, **kwargs):
+        modified = get_object_or_404(
+            News.objects.values_list('modified', flat=True),
+            pk=self.kwargs['pk']
+        )
+        thread = self.get_comment_thread(self.kwargs['pk'], modified)
+        return HttpResponse(thread['comment_thread'])
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentThreadMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,38 +197,86 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        # Счётчик комментариев сдвигает сигнал, в той же транзакции.
+        with transaction.atomic():
+            comment.save()
         return super().form_valid(form)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(
+            self.get_comment_thread(self.object.pk, self.object.modified)
+        )
+        return context
+
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
+    # Передаётся обеим страницам, см. yanews.async_views.
+    response_class = TemplateResponse
 
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
+        view = NewsDetail.as_view(response_class=self.response_class)
         return view(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
+        view = NewsComment.as_view(response_class=self.response_class)
         return view(request, *args, **kwargs)
 
 
+class NewsFeedApi(generic.View):
+    """Лента новостей в JSON, страницы по курсору, как в архиве."""
+    ordering = ('-date', '-id')
+
+    def get(self, request, *args, **kwargs):
+        return page_response(
+            request,
+            News.objects.all(),
+            self.ordering,
+            FEED_FIELDS,
+            FEED_DEFAULT,
+            settings.NEWS_COUNT_ON_HOME_PAGE,
+        )
+
+
+class NewsCommentsApi(generic.View):
+    """Комментарии новости в JSON, в порядке ленты на странице новости."""
+    ordering = ('created', 'id')
+
+    def get(self, request, *args, **kwargs):
+        news_id = get_object_or_404(
+            News.objects.values_list('id', flat=True), pk=self.kwargs['pk']
+        )
+        return page_response(
+            request,
+            Comment.objects.filter(news_id=news_id),
+            self.ordering,
+            COMMENT_FIELDS,
+            COMMENT_DEFAULT,
+            settings.COMMENTS_COUNT_ON_PAGE,
+        )
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        queryset = self.model.objects.filter(author=self.request.user)
+        if self.request.method == 'GET':
+            # Страницы правки и удаления показывают заголовок новости.
+            queryset = queryset.select_related('news')
+        return queryset
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -98,7 +284,17 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        # Отметку изменения у новости ставит сигнал, в той же транзакции.
+        with transaction.atomic():
+            return super().form_valid(form)
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        # Счётчик комментариев сдвигает сигнал, в той же транзакции.
+        with transaction.atomic():
+            return super().delete(request, *args, **kwargs)
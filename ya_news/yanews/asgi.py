@@ -9,8 +9,25 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
 from django.core.asgi import get_asgi_application
+from django.db import connections
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    # Django 3.2 выполняет синхронный код всех запросов в одном общем
+    # потоке. Свой контекст даёт каждому запросу отдельный поток, и
+    # запросы к базе разных клиентов идут параллельно, как под WSGI.
+    # Цена — соединение с базой на каждый запрос: поток после запроса
+    # больше не используется, поэтому его соединения закрываются сразу,
+    # а CONN_MAX_AGE под ASGI не действует. Переиспользовать соединения
+    # в этом режиме должен пулер, например pgbouncer (DB_PGBOUNCER=1).
+    async with ThreadSensitiveContext():
+        try:
+            await django_application(scope, receive, send)
+        finally:
+            await sync_to_async(connections.close_all)()
@@ -0,0 +1,51 @@
+"""
+Асинхронные версии страниц чтения для запуска под ASGI.
+
+Django 3.2 не поддерживает асинхронные CBV, поэтому страница остаётся
+обычным классом, а снаружи её оборачивает асинхронная функция. Вся
+синхронная работа — запросы к базе, кэш и шаблон — выполняется за один
+переход в поток через sync_to_async, цикл событий не блокируется.
+Обычный TemplateResponse рисуется уже после представления, и под ASGI
+Django делает для этого второй переход, поэтому здесь ответ рисуется
+сразу, в том же потоке.
+
+Включается настройкой ASYNC_VIEWS; под WSGI асинхронные страницы только
+медленнее, и по умолчанию используются синхронные.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+
+class RenderedTemplateResponse(HttpResponse):
+    """Замена TemplateResponse, которая рисует шаблон при создании."""
+
+    def __init__(self, request, template, context=None, using=None,
+                 **kwargs):
+        super().__init__(
+            render_to_string(template, context, request, using), **kwargs
+        )
+
+
+def read_view(view_class, **initkwargs):
+    """
+    Представление страницы чтения для urls.py.
+
+    При ASYNC_VIEWS — асинхронная функция, иначе обычный as_view().
+    """
+    if not settings.ASYNC_VIEWS:
+        return view_class.as_view(**initkwargs)
+    view = sync_to_async(view_class.as_view(
+        response_class=RenderedTemplateResponse, **initkwargs
+    ))
+
+    async def async_view(request, *args, **kwargs):
+        return await view(request, *args, **kwargs)
+
+    async_view.view_class = view_class
+    async_view.view_initkwargs = initkwargs
+    async_view.__doc__ = view_class.__doc__
+    async_view.__module__ = view_class.__module__
+    async_view.__name__ = view_class.__name__
+    return async_view
@@ -0,0 +1,177 @@
+"""
+Замеры времени обработки запросов.
+
+Включаются настройкой PERF_INSTRUMENTATION. Выключенный middleware
+исключается из цепочки при запуске и ничего не стоит.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.db import connections
+from django.http import HttpResponse
+from news.cache import page_cache_stats
+
+PREFIX = 'yanews'
+DURATION_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+METRICS = {
+    'request_duration_seconds': ('Время обработки запроса', DURATION_BUCKETS),
+    'db_duration_seconds': ('Время SQL-запросов', DURATION_BUCKETS),
+    'db_queries': ('Число SQL-запросов', QUERY_BUCKETS),
+    'template_duration_seconds': ('Время рендера шаблона', DURATION_BUCKETS),
+    'response_size_bytes': ('Размер ответа', SIZE_BUCKETS),
+}
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    """Гистограммы по маршрутам в памяти процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, route, values):
+        with self._lock:
+            for metric, value in values.items():
+                histogram = self._histograms.get((metric, route))
+                if histogram is None:
+                    histogram = self._histograms[metric, route] = Histogram(
+                        METRICS[metric][1]
+                    )
+                histogram.observe(value)
+
+    def render(self):
+        """Текстовый формат Prometheus."""
+        lines = []
+        with self._lock:
+            for metric, (help_text, _) in METRICS.items():
+                name = f'{PREFIX}_{metric}'
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (key, route), histogram in sorted(
+                    self._histograms.items()
+                ):
+                    if key == metric:
+                        lines.extend(_render_histogram(name, route, histogram))
+        return '\n'.join(lines) + '\n'
+
+
+def _render_histogram(name, route, histogram):
+    total = 0
+    bounds = (*histogram.buckets, '+Inf')
+    for bound, count in zip(bounds, histogram.counts):
+        total += count
+        yield f'{name}_bucket{{route="{route}",le="{bound}"}} {total}'
+    yield f'{name}_sum{{route="{route}"}} {histogram.sum}'
+    yield f'{name}_count{{route="{route}"}} {total}'
+
+
+registry = Registry()
+
+
+class PerformanceMiddleware:
+    """
+    Время запроса, число и время SQL, время шаблона и размер ответа.
+
+    Значения уходят в заголовок Server-Timing и в гистограммы по имени
+    маршрута (news:home и т. п.).
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = {'queries': 0, 'db': 0.0, 'template': 0.0}
+
+        def count_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats['queries'] += 1
+                stats['db'] += time.perf_counter() - started
+
+        request._perf_stats = stats
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        size = 0 if response.streaming else len(response.content)
+        match = request.resolver_match
+        registry.observe(match.view_name if match else 'unresolved', {
+            'request_duration_seconds': total,
+            'db_duration_seconds': stats['db'],
+            'db_queries': stats['queries'],
+            'template_duration_seconds': stats['template'],
+            'response_size_bytes': size,
+        })
+        response['Server-Timing'] = (
+            f'total;dur={total * 1000:.1f}, '
+            f'db;dur={stats["db"] * 1000:.1f};desc="{stats["queries"]} SQL", '
+            f'tpl;dur={stats["template"] * 1000:.1f}'
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._perf_stats['template'] += time.perf_counter() - started
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    """
+    Метрики процесса для Prometheus.
+
+    Доступны сотрудникам или по заголовку Authorization: Bearer с токеном
+    из настройки PERF_METRICS_TOKEN.
+    """
+    token = settings.PERF_METRICS_TOKEN
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if not (
+        request.user.is_staff
+        or token and authorization == f'Bearer {token}'
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        registry.render() + _render_page_cache(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def _render_page_cache():
+    stats = page_cache_stats.snapshot()
+    lines = []
+    for name, key in (
+        ('page_cache_hits_total', 'hits'),
+        ('page_cache_misses_total', 'misses'),
+        ('page_cache_hit_seconds_total', 'hit_seconds_total'),
+    ):
+        lines.append(f'# TYPE {PREFIX}_{name} counter')
+        lines.append(f'{PREFIX}_{name} {stats[key]}')
+    return '\n'.join(lines) + '\n'
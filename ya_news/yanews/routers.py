@@ -0,0 +1,97 @@
+import asyncio
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Запросы текущего HTTP-запроса идут только в основную базу.
+_pinned = ContextVar('pinned_to_primary', default=False)
+# В текущем HTTP-запросе была запись.
+_wrote = ContextVar('wrote_to_primary', default=False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Чтение с реплики, запись в основную базу.
+
+    Пока реплика не настроена, все запросы идут в основную базу. После
+    записи клиент на REPLICA_PIN_SECONDS закрепляется за основной базой,
+    чтобы сразу увидеть свои изменения, например новый комментарий.
+    """
+
+    def db_for_read(self, model, **hints):
+        if REPLICA in settings.DATABASES and not _pinned.get():
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaPinMiddleware:
+    """
+    Закрепляет за основной базой изменяющие запросы и их авторов.
+
+    Работает и в синхронной, и в асинхронной цепочке, чтобы под ASGI не
+    добавлять лишних переходов между потоками.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django узнаёт, что экземпляр нужно ждать через await.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        tokens = self._enter(request)
+        try:
+            return self._leave(self.get_response(request))
+        finally:
+            self._reset(tokens)
+
+    async def __acall__(self, request):
+        tokens = self._enter(request)
+        try:
+            return self._leave(await self.get_response(request))
+        finally:
+            self._reset(tokens)
+
+    def _enter(self, request):
+        return (
+            _pinned.set(
+                request.method not in SAFE_METHODS
+                or settings.REPLICA_PIN_COOKIE in request.COOKIES
+            ),
+            _wrote.set(False),
+        )
+
+    def _leave(self, response):
+        if _wrote.get():
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def _reset(self, tokens):
+        pinned, wrote = tokens
+        _pinned.reset(pinned)
+        _wrote.reset(wrote)
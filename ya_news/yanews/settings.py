@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,7 +22,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yanews.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,12 +54,75 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Профиль базы данных выбирается переменной окружения DJANGO_DB_PROFILE:
+# sqlite (по умолчанию, для установки на одном сервере) или postgres.
+DB_PROFILE = os.getenv('DJANGO_DB_PROFILE', 'sqlite')
+
+if DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'yanews.db_backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'yanews'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Соединение переживает запрос и используется повторно.
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+            # Перед первым запросом в HTTP-запросе проверяем, живо ли соединение.
+            'CONN_HEALTH_CHECKS': True,
+            # В режиме пулинга транзакций pgbouncer серверные курсоры не работают.
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_PGBOUNCER') == '1',
+            'OPTIONS': {
+                'connect_timeout': 5,
+            },
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'yanews.db_backends.sqlite3',
+            'NAME': os.getenv('SQLITE_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': 20,
+            },
+            # Выполняются на каждом новом соединении.
+            'PRAGMAS': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'busy_timeout': 20000,
+                'mmap_size': 256 * 1024 * 1024,
+            },
+        }
+    }
+
+# Реплика для чтения. Для PostgreSQL это отдельный сервер DB_REPLICA_HOST,
+# для SQLite в режиме WAL — тот же файл, открытый только на чтение:
+# читатели не ждут, пока пишущий завершит транзакцию.
+if DB_PROFILE == 'postgres' and os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif DB_PROFILE != 'postgres' and os.getenv('DB_REPLICA') == '1':
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': 'file:{}?mode=ro'.format(DATABASES['default']['NAME']),
+        'PRAGMAS': {
+            'query_only': 1,
+            'busy_timeout': 20000,
+            'mmap_size': 256 * 1024 * 1024,
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['yanews.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи клиент читает из основной базы.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'pin_primary'
 
 
 AUTH_PASSWORD_VALIDATORS = []
@@ -80,3 +146,40 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_PAGE = 50
+
+NEWS_SEARCH_RESULTS_ON_PAGE = 20
+
+# Кэш в памяти процесса: ключ страницы включает версию её данных из базы
+# (news.conditional.page_state), поэтому у каждого воркера свой кэш, но
+# устаревшую страницу не отдаёт ни один.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Срок лишь страхует от правок в обход сигналов и модели.
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Ключ ленты комментариев меняется при каждом её изменении, поэтому срок
+# нужен только для вытеснения старых версий.
+NEWS_THREAD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Асинхронные страницы чтения для запуска под ASGI, см. async_views.
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS') == '1'
+
+# Замеры запросов: заголовок Server-Timing и гистограммы на /metrics/.
+PERF_INSTRUMENTATION = os.getenv('DJANGO_PERF_INSTRUMENTATION') == '1'
+# Токен для сборщика метрик; без него метрики видят только сотрудники.
+PERF_METRICS_TOKEN = os.getenv('DJANGO_PERF_METRICS_TOKEN', '')
+
+# Порог медленного SQL-запроса в миллисекундах; None выключает журнал.
+SLOW_QUERY_MS = (
+    float(os.environ['DJANGO_SLOW_QUERY_MS'])
+    if os.getenv('DJANGO_SLOW_QUERY_MS') else None
+)
+# Доля медленных запросов, попадающих в журнал, и предел записей в минуту.
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv('DJANGO_SLOW_QUERY_SAMPLE_RATE', 1))
+SLOW_QUERY_MAX_PER_MINUTE = int(os.getenv('DJANGO_SLOW_QUERY_MAX_PER_MINUTE', 60))
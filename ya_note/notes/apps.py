@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .slow_queries import install
+
+        connection_created.connect(install)
@@ -0,0 +1,112 @@
+"""
+Импорт и экспорт заметок в формате JSON Lines: по объекту на строку.
+
+Обе стороны работают потоком, поэтому память не растёт с числом заметок.
+"""
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .forms import WARNING, NoteImportForm
+from .models import Note
+from .slugs import SlugAllocator, build_slug
+
+EXPORT_FIELDS = ('title', 'text', 'slug')
+CHUNK_SIZE = 1000
+
+
+def export_notes(queryset, chunk_size=CHUNK_SIZE):
+    """Строки JSON Lines; заметки читаются из базы пачками."""
+    for note in queryset.order_by('id').values(*EXPORT_FIELDS).iterator(
+        chunk_size=chunk_size
+    ):
+        yield json.dumps(note, ensure_ascii=False) + '\n'
+
+
+def _line_error(number, message):
+    return ValidationError(f'Строка {number}: {message}')
+
+
+def parse_notes(lines, author):
+    """
+    Заметки из строк JSON Lines, проверенные правилами NoteForm.
+
+    Пустые строки пропускаются. На первой ошибке поднимается
+    ValidationError с номером строки.
+    """
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode()
+            except UnicodeDecodeError:
+                raise _line_error(number, 'файл должен быть в кодировке UTF-8')
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            raise _line_error(number, 'некорректный JSON')
+        if not isinstance(data, dict):
+            raise _line_error(number, 'ожидается объект')
+        form = NoteImportForm(data=data)
+        if not form.is_valid():
+            errors = '; '.join(
+                f'{field}: {" ".join(messages)}'
+                for field, messages in form.errors.items()
+            )
+            raise _line_error(number, errors)
+        note = form.save(commit=False)
+        note.author = author
+        yield number, note
+
+
+def _assign_slugs(chunk, allocator):
+    """Адреса для пачки: один запрос на явные и один на подобранные."""
+    explicit = {note.slug for _, note in chunk if note.slug}
+    existing = set(
+        Note.objects.filter(slug__in=explicit).values_list('slug', flat=True)
+    )
+    for number, note in chunk:
+        if note.slug:
+            if note.slug in existing or note.slug in allocator.taken:
+                raise _line_error(number, note.slug + WARNING)
+            allocator.taken.add(note.slug)
+    bases = {
+        id(note): build_slug(note.title, allocator.max_length)
+        for _, note in chunk if not note.slug
+    }
+    allocator.load(bases.values())
+    for _, note in chunk:
+        if not note.slug:
+            note.slug = allocator.allocate(bases[id(note)])
+
+
+def import_notes(lines, author, chunk_size=CHUNK_SIZE):
+    """
+    Сохраняет заметки из строк JSON Lines одной транзакцией.
+
+    Заметки вставляются через bulk_create пачками по chunk_size, адреса
+    для пачки подбираются заранее. Если хотя бы одна строка не проходит
+    проверку, не сохраняется ничего. Возвращает число заметок.
+    """
+    allocator = SlugAllocator(
+        Note.objects.all(), Note._meta.get_field('slug').max_length
+    )
+    notes = parse_notes(lines, author)
+    created = 0
+    try:
+        with transaction.atomic():
+            while True:
+                chunk = list(islice(notes, chunk_size))
+                if not chunk:
+                    return created
+                _assign_slugs(chunk, allocator)
+                Note.objects.bulk_create(note for _, note in chunk)
+                created += len(chunk)
+    except IntegrityError:
+        # Адрес заняли параллельно: транзакция откатилась целиком.
+        raise ValidationError(
+            'Адреса заметок изменились во время импорта, повторите его.'
+        )
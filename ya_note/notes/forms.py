@@ -1,6 +1,5 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from pytils.translit import slugify
 
 from .models import Note
 
@@ -15,14 +14,37 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Пустой slug подберёт Note.save по заголовку.
+        """
+        slug = self.cleaned_data.get('slug')
+        if slug and Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+
+class NoteImportForm(NoteForm):
+    """
+    Проверка одной заметки из импорта.
+
+    Уникальность slug проверяется сразу для пачки заметок, поэтому
+    запросов к базе на каждую заметку форма не делает.
+    """
+
+    def clean_slug(self):
+        return self.cleaned_data.get('slug')
+
+    def validate_unique(self):
+        pass
+
+
+class NotesUploadForm(forms.Form):
+    """Файл JSON Lines: по заметке на строку."""
+    file = forms.FileField(
+        label='Файл',
+        help_text='Каждая строка — объект с полями title, text и slug'
+    )
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.bulk import CHUNK_SIZE, export_notes
+from notes.models import Note
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки пользователя в файл JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path', help='файл или - для stdout')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if not User.objects.filter(
+            username=options['username']
+        ).exists():
+            raise CommandError('Пользователь не найден.')
+        lines = export_notes(
+            Note.objects.filter(author__username=options['username']),
+            options['chunk_size'],
+        )
+        if options['path'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+        else:
+            with open(options['path'], 'w', encoding='utf-8') as file:
+                file.writelines(lines)
@@ -0,0 +1,36 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.bulk import CHUNK_SIZE, import_notes
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Загружает заметки пользователя из файла JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path', help='файл или - для stdin')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден.')
+        if options['path'] == '-':
+            created = self.load(sys.stdin, author, options['chunk_size'])
+        else:
+            with open(options['path'], encoding='utf-8') as file:
+                created = self.load(file, author, options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Загружено заметок: {created}'))
+
+    def load(self, lines, author, chunk_size):
+        try:
+            return import_notes(lines, author, chunk_size)
+        except ValidationError as error:
+            raise CommandError(' '.join(error.messages))
@@ -0,0 +1,92 @@
+from django.db import migrations
+
+SQLITE_FORWARD = (
+    # Внешнее содержимое: текст хранится только в notes_note, индекс — в
+    # таблице FTS5. Номер автора индексируется, чтобы поиск сразу
+    # ограничивался его заметками.
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        author_id, title, text,
+        content='notes_note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, author_id, title, text
+        )
+        VALUES ('delete', old.id, old.author_id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update
+    AFTER UPDATE OF author_id, title, text ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, author_id, title, text
+        )
+        VALUES ('delete', old.id, old.author_id, old.title, old.text);
+        INSERT INTO notes_note_fts(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+SQLITE_BACKWARD = (
+    'DROP TRIGGER notes_note_fts_insert',
+    'DROP TRIGGER notes_note_fts_delete',
+    'DROP TRIGGER notes_note_fts_update',
+    'DROP TABLE notes_note_fts',
+)
+POSTGRESQL_FORWARD = (
+    # Вычисляемый столбец PostgreSQL 12+ обновляется вместе со строкой.
+    """
+    ALTER TABLE notes_note ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', title), 'A')
+        || setweight(to_tsvector('russian', text), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX notes_note_search_idx ON notes_note '
+    'USING GIN (search_vector)',
+)
+POSTGRESQL_BACKWARD = (
+    'DROP INDEX notes_note_search_idx',
+    'ALTER TABLE notes_note DROP COLUMN search_vector',
+)
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+    'postgresql': (POSTGRESQL_FORWARD, POSTGRESQL_BACKWARD),
+}
+
+
+def run(schema_editor, backward):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    # На остальных базах поиск работает без индекса.
+    for sql in statements[backward] if statements else ():
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    run(schema_editor, backward=False)
+
+
+def drop_search_index(apps, schema_editor):
+    run(schema_editor, backward=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
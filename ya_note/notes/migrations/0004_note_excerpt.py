@@ -0,0 +1,81 @@
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+# Копия notes.models.make_excerpt: миграция не должна зависеть от модели.
+EXCERPT_WORDS = 15
+EXCERPT_LENGTH = 255
+# SQLite добавляет и удаляет столбец, пересоздавая таблицу notes_note, и
+# триггеры индекса notes_note_fts (0002_note_search) пропадают вместе со
+# старой таблицей. Их нужно создать заново после каждой такой операции.
+SQLITE_TRIGGERS = (
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, author_id, title, text
+        )
+        VALUES ('delete', old.id, old.author_id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update
+    AFTER UPDATE OF author_id, title, text ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, author_id, title, text
+        )
+        VALUES ('delete', old.id, old.author_id, old.title, old.text);
+        INSERT INTO notes_note_fts(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+)
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+def fill_excerpts(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    notes = Note.objects.using(schema_editor.connection.alias)
+    batch = []
+    for note in notes.only('id', 'text').iterator(BATCH_SIZE):
+        note.excerpt = Truncator(
+            Truncator(note.text).words(EXCERPT_WORDS)
+        ).chars(EXCERPT_LENGTH)
+        batch.append(note)
+        if len(batch) == BATCH_SIZE:
+            notes.bulk_update(batch, ['excerpt'])
+            batch = []
+    notes.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_author_id_idx'),
+    ]
+
+    operations = [
+        # При откате выполняется последней, после удаления столбца.
+        migrations.RunPython(
+            migrations.RunPython.noop, restore_search_triggers
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='excerpt',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(
+            restore_search_triggers, migrations.RunPython.noop
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,28 @@
 from django.conf import settings
-from django.db import models
-from pytils.translit import slugify
+from django.db import IntegrityError, models, transaction
+from django.utils.text import Truncator
+
+from .slugs import SLUG_ATTEMPTS, build_slug, next_free_slug
+
+# Начало текста для списка: столько слов и не больше EXCERPT_LENGTH знаков.
+EXCERPT_WORDS = 15
+EXCERPT_LENGTH = 255
+
+
+def make_excerpt(text):
+    return Truncator(Truncator(text).words(EXCERPT_WORDS)).chars(
+        EXCERPT_LENGTH
+    )
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create не вызывает save(), поэтому анонс заполняем здесь."""
+        objs = list(objs)
+        for note in objs:
+            note.excerpt = make_excerpt(note.text)
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 class Note(models.Model):
@@ -14,6 +36,9 @@ class Note(models.Model):
         'Текст',
         help_text='Добавьте подробностей'
     )
+    excerpt = models.CharField(
+        max_length=EXCERPT_LENGTH, default='', editable=False
+    )
     slug = models.SlugField(
         'Адрес для страницы с заметкой',
         max_length=100,
@@ -27,11 +52,37 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            # Постраничный список заметок автора.
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        self.excerpt = make_excerpt(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        base = build_slug(self.title, max_slug_length)
+        others = Note.objects.exclude(pk=self.pk)
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = next_free_slug(others, base, max_slug_length)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Адрес занял параллельный запрос: берём следующий.
+                if (
+                    attempt == SLUG_ATTEMPTS - 1
+                    or not others.filter(slug=self.slug).exists()
+                ):
+                    self.slug = ''
+                    raise
@@ -0,0 +1,151 @@
+"""
+Полнотекстовый поиск по заметкам автора.
+
+В SQLite запрос идёт в таблицу FTS5 notes_note_fts, в PostgreSQL — в
+столбец search_vector с индексом GIN (миграция 0002_note_search). На
+остальных базах работает простой поиск по вхождению без ранжирования.
+Совпадения выделяет ts_headline в PostgreSQL и сам модуль на остальных
+базах, только для заметок текущей страницы.
+"""
+import re
+
+from django.db import connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+
+SEARCH_LIMIT = 50
+# Границы найденных слов в заголовке и отрывке; заменяются на <mark>.
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_WORDS = 16
+WORD_RE = re.compile(r'\w+')
+
+# Сначала только ранжирование по индексу, без чтения текстов: отрывки
+# для всех совпадений, а не для одной страницы, стоили бы в разы дороже.
+SQLITE_SEARCH = """
+    SELECT n.id, n.slug, n.title, n.text
+    FROM (
+        SELECT rowid, bm25(notes_note_fts, 0, 10.0, 1.0) AS rank
+        FROM notes_note_fts
+        WHERE notes_note_fts MATCH %s
+        ORDER BY rank
+        LIMIT %s
+    ) hits
+    JOIN notes_note n ON n.id = hits.rowid
+    ORDER BY hits.rank
+"""
+POSTGRESQL_SEARCH = f"""
+    SELECT id, slug, title,
+        ts_headline(
+            'russian', title, query,
+            'HighlightAll=true, StartSel=' || chr(2) || ', StopSel=' || chr(3)
+        ) AS title_marked,
+        ts_headline(
+            'russian', text, query,
+            'MaxWords={SNIPPET_WORDS}, MinWords=5, '
+            || 'StartSel=' || chr(2) || ', StopSel=' || chr(3)
+        ) AS snippet_marked
+    FROM notes_note, to_tsquery('russian', %s) query
+    WHERE author_id = %s AND search_vector @@ query
+    ORDER BY ts_rank_cd(search_vector, query) DESC, id
+    LIMIT %s
+"""
+
+
+def _marked_html(text):
+    """Экранирует текст и превращает границы совпадений в <mark>."""
+    return mark_safe(
+        escape(text)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def _words_re(words):
+    """Слова запроса как отдельные слова текста, последнее — по префиксу."""
+    *exact, last = map(re.escape, words)
+    return re.compile(
+        r'(?<!\w)(' + '|'.join([*exact, last + r'\w*']) + r')(?!\w)',
+        re.IGNORECASE,
+    )
+
+
+def _mark(text, pattern):
+    return pattern.sub(MARK_START + r'\1' + MARK_END, text)
+
+
+def _snippet(text, pattern):
+    """Около SNIPPET_WORDS слов текста вокруг первого совпадения."""
+    words = text.split()
+    first = next(
+        (index for index, word in enumerate(words) if pattern.search(word)),
+        0,
+    )
+    start = max(first - SNIPPET_WORDS // 4, 0)
+    end = start + SNIPPET_WORDS
+    return ''.join((
+        '… ' if start else '',
+        _mark(' '.join(words[start:end]), pattern),
+        ' …' if end < len(words) else '',
+    ))
+
+
+def fts5_query(author_id, words):
+    """
+    Запрос FTS5 из слов пользователя.
+
+    Каждое слово берётся в кавычки, поэтому операторы FTS5 из ввода
+    пользователя не действуют. По префиксу ищется только последнее,
+    возможно недописанное слово: префиксный поиск сливает списки всех
+    подходящих слов и заметно дороже точного.
+    """
+    terms = ' '.join(f'"{word}"' for word in words) + '*'
+    return f'author_id:"{author_id}" AND {{title text}}:({terms})'
+
+
+def tsquery(words):
+    """
+    Запрос to_tsquery из слов пользователя, как у fts5_query.
+
+    Слова состоят только из букв и цифр и берутся в кавычки, поэтому
+    операторы tsquery из ввода не действуют. Последнее слово ищется по
+    префиксу: «:*» сравнивает начало лексемы.
+    """
+    *exact, last = (f"'{word}'" for word in words)
+    return ' & '.join([*exact, last + ':*'])
+
+
+def search_notes(author, query, limit=SEARCH_LIMIT):
+    """
+    Заметки автора по запросу, сначала самые подходящие.
+
+    У каждой заметки есть title_html и snippet_html с выделенными
+    совпадениями, безопасные для вывода в шаблон.
+    """
+    words = WORD_RE.findall(query.lower())
+    if not words:
+        return []
+    vendor = connections[Note.objects.db].vendor
+    if vendor == 'sqlite':
+        notes = Note.objects.raw(
+            SQLITE_SEARCH, (fts5_query(author.pk, words), limit)
+        )
+    elif vendor == 'postgresql':
+        notes = Note.objects.raw(
+            POSTGRESQL_SEARCH, (tsquery(words), author.pk, limit)
+        )
+    else:
+        notes = Note.objects.filter(
+            author=author, text__icontains=query
+        ).order_by('id')[:limit]
+    notes = list(notes)
+    pattern = _words_re(words)
+    for note in notes:
+        if not hasattr(note, 'title_marked'):
+            note.title_marked = _mark(note.title, pattern)
+            note.snippet_marked = _snippet(note.text, pattern)
+        note.title_html = _marked_html(note.title_marked)
+        note.snippet_html = _marked_html(note.snippet_marked)
+    return notes
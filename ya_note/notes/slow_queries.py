@@ -0,0 +1,119 @@
+"""
+Журнал медленных SQL-запросов.
+
+Обёртка выполнения запросов ставится на каждое новое соединение, если
+задана настройка SLOW_QUERY_MS. Запрос дольше порога попадает в журнал
+вместе с параметрами, строкой кода, откуда он вызван, и планом
+выполнения. В журнал идёт лишь доля SLOW_QUERY_SAMPLE_RATE медленных
+запросов и не больше SLOW_QUERY_MAX_PER_MINUTE записей в минуту.
+"""
+import logging
+import random
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+# Внутри своего EXPLAIN обёртка не срабатывает.
+_local = threading.local()
+
+
+class RateLimiter:
+    """Не больше limit разрешений за минуту на процесс."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._window = 0
+        self._count = 0
+
+    def allow(self, limit):
+        window = int(time.monotonic() // 60)
+        with self._lock:
+            if window != self._window:
+                self._window = window
+                self._count = 0
+            if self._count >= limit:
+                return False
+            self._count += 1
+            return True
+
+
+rate_limiter = RateLimiter()
+
+
+def _caller():
+    """Ближайший к запросу кадр стека из кода проекта."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        if (
+            frame.filename.startswith(base_dir)
+            and frame.filename != __file__
+            and 'site-packages' not in frame.filename
+        ):
+            return f'{frame.filename}:{frame.lineno} in {frame.name}'
+    return 'неизвестно'
+
+
+def _explain(connection, sql, params):
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if (
+        prefix is None
+        or not sql.lstrip().upper().startswith('SELECT')
+        or connection.needs_rollback
+    ):
+        return None
+    _local.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return '\n'.join(' '.join(map(str, row)) for row in cursor)
+    except DatabaseError as error:
+        return f'не удалось: {error}'
+    finally:
+        _local.explaining = False
+
+
+def log_slow_query(execute, sql, params, many, context):
+    if getattr(_local, 'explaining', False):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        if (
+            duration >= settings.SLOW_QUERY_MS
+            and random.random() < settings.SLOW_QUERY_SAMPLE_RATE
+            and rate_limiter.allow(settings.SLOW_QUERY_MAX_PER_MINUTE)
+        ):
+            connection = context['connection']
+            logger.warning(
+                'Медленный запрос %.1f мс (%s)\n%s\nПараметры: %r\n'
+                'Вызван из %s\nПлан:\n%s',
+                duration, connection.alias, sql, params, _caller(),
+                None if many else _explain(connection, sql, params),
+            )
+
+
+def install(sender, connection, **kwargs):
+    """
+    Обработчик connection_created.
+
+    Соединение может открыться посреди запроса, внутри execute_wrapper()
+    замеров: тот на выходе снимает последнюю обёртку списка. Поэтому
+    журнал встаёт в начало списка, снаружи временных обёрток.
+    """
+    if (
+        settings.SLOW_QUERY_MS is not None
+        and log_slow_query not in connection.execute_wrappers
+    ):
+        connection.execute_wrappers.insert(0, log_slow_query)
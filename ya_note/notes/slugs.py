@@ -0,0 +1,106 @@
+import re
+from functools import lru_cache
+
+from django.db.models import Count, IntegerField, Max, Q
+from django.db.models.functions import Cast, Substr
+from pytils.translit import slugify
+
+# Сколько раз Note.save пробует занять адрес, если его опередили.
+SLUG_ATTEMPTS = 5
+# Сколько последних заголовков помнит build_slug.
+SLUG_CACHE_SIZE = 4096
+SUFFIX_RE = re.compile(r'(.+)-(\d+)')
+# Место под номер «-N», которое основа оставляет до max_length. Иначе
+# номер срезал бы конец основы, и такие адреса не нашлись бы по ней.
+SLUG_SUFFIX_LENGTH = 10
+
+
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
+def build_slug(title, max_length):
+    """
+    Основа адреса из заголовка: транслитерация pytils, обрезанная так,
+    чтобы вместе с номером уложиться в max_length.
+
+    Заголовки часто повторяются, поэтому результат запоминается;
+    статистику попаданий даёт build_slug.cache_info().
+    """
+    return slugify(title)[:max_length - SLUG_SUFFIX_LENGTH]
+
+
+class SlugAllocator:
+    """
+    Раздаёт свободные адреса вида base, base-2, base-3 и т. д.
+
+    Занятые адреса для всех основ пачки выбираются одним запросом по
+    диапазонам, которые обслуживает уникальный индекс на slug: все base-*
+    лежат между 'base-' и 'base.'. Запрос возвращает все k адресов основы,
+    это окупается при импорте, где на пачку приходится один запрос. Для
+    одной заметки есть next_free_slug. Окончательно занятость проверяет
+    сама база при вставке.
+    """
+
+    def __init__(self, queryset, max_length):
+        self.queryset = queryset
+        self.max_length = max_length
+        # Последний занятый номер для каждой загруженной основы.
+        self.last = {}
+        # Адреса, уже выданные или зарезервированные этим распределителем.
+        self.taken = set()
+
+    def load(self, bases):
+        bases = set(bases) - self.last.keys()
+        if not bases:
+            return
+        condition = Q()
+        for base in bases:
+            condition |= Q(slug__gte=base, slug__lt=base + '.')
+            self.last[base] = 0
+        for slug in self.queryset.filter(condition).values_list(
+            'slug', flat=True
+        ):
+            if slug in bases:
+                self.last[slug] = max(self.last[slug], 1)
+                continue
+            match = SUFFIX_RE.fullmatch(slug)
+            if match and match[1] in bases:
+                self.last[match[1]] = max(self.last[match[1]], int(match[2]))
+
+    def allocate(self, base):
+        """Следующий свободный адрес; основа должна быть загружена."""
+        number = self.last[base]
+        while True:
+            number += 1
+            slug = base
+            if number > 1:
+                end = f'-{number}'
+                slug = base[:self.max_length - len(end)] + end
+            if slug not in self.taken:
+                break
+        self.last[base] = number
+        self.taken.add(slug)
+        return slug
+
+
+def next_free_slug(queryset, base, max_length):
+    """
+    Свободный адрес для одной заметки, одним запросом.
+
+    Из базы приходит одна строка: есть ли сам base и наибольший номер
+    среди base-N. База по-прежнему просматривает диапазон индекса с k
+    адресами основы, но не передаёт их, а Python их не разбирает.
+    """
+    numbered = Q(
+        slug__gt=base + '-', slug__lt=base + '.',
+        # Не больше девяти цифр: номер должен поместиться в integer.
+        slug__regex=rf'^{re.escape(base)}-[0-9]{{1,9}}$',
+    )
+    found = queryset.filter(Q(slug=base) | numbered).aggregate(
+        exact=Count('pk', filter=Q(slug=base)),
+        number=Max(
+            Cast(Substr('slug', len(base) + 2), IntegerField()),
+            filter=numbered,
+        ),
+    )
+    allocator = SlugAllocator(queryset, max_length)
+    allocator.last[base] = max(found['number'] or 0, int(bool(found['exact'])))
+    return allocator.allocate(base)
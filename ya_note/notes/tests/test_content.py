@@ -1,8 +1,14 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
 from notes.models import Note
+from notes.search import fts5_query, tsquery
+from notes.views import NoteDetail, NotesList
+from yanote.async_views import read_view
 
 
 User = get_user_model()
@@ -27,6 +33,22 @@ class TestContent(TestCase):
         Note.objects.bulk_create(all_notes)
         cls.note_obj = Note.objects.get(pk=1)
 
+    @override_settings(ASYNC_VIEWS=True)
+    def test_async_read_views(self):
+        ''' Асинхронные страницы отдают уже нарисованный ответ '''
+        for view_class, kwargs in (
+            (NotesList, {}),
+            (NoteDetail, {'slug': self.note_obj.slug}),
+        ):
+            with self.subTest(view=view_class.__name__):
+                view = read_view(view_class)
+                self.assertTrue(asyncio.iscoroutinefunction(view))
+                request = RequestFactory().get('/')
+                request.user = self.author
+                response = async_to_sync(view)(request, **kwargs)
+                self.assertFalse(hasattr(response, 'render'))
+                self.assertContains(response, self.note_obj.slug)
+
     def test_notes_order(self):
         ''' Тестируем сортировку заметок '''
         self.client.force_login(self.author)
@@ -56,6 +78,89 @@ class TestContent(TestCase):
         object_list = response.context['object_list']
         self.assertNotIn(self.note_obj, object_list)
 
+    @override_settings(NOTES_COUNT_ON_PAGE=3)
+    def test_notes_pages_cover_all_notes(self):
+        ''' Страницы списка идут по порядку без пропусков и без текста '''
+        self.client.force_login(self.author)
+        seen = []
+        data = {}
+        while True:
+            response = self.client.get(self.NOTES_URL, data)
+            notes = response.context['object_list']
+            self.assertLessEqual(len(notes), 3)
+            for note in notes:
+                self.assertIn('text', note.get_deferred_fields())
+                self.assertEqual(note.excerpt, 'Просто текст.')
+            seen.extend(note.pk for note in notes)
+            if not response.context['next_cursor']:
+                break
+            data['cursor'] = response.context['next_cursor']
+        self.assertEqual(
+            seen,
+            list(
+                Note.objects.filter(author=self.author)
+                .order_by('id').values_list('id', flat=True)
+            ),
+        )
+
+
+class TestSearch(TestCase):
+    NOTES_URL = reverse('notes:list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.reader = User.objects.create(username='Читатель')
+        cls.in_title = Note.objects.create(
+            title='Покупки к празднику', text='Торт и свечи', author=cls.author
+        )
+        cls.in_text = Note.objects.create(
+            title='Дела', text='Список покупок <b>на неделю</b>',
+            author=cls.author,
+        )
+        cls.other = Note.objects.create(
+            title='Чужие покупки', text='Хлеб', author=cls.reader
+        )
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def search(self, query):
+        response = self.client.get(self.NOTES_URL, {'q': query})
+        return response, list(response.context['object_list'])
+
+    def test_search_is_ranked_and_limited_to_author(self):
+        ''' Совпадение в заголовке выше, чужие заметки не находятся '''
+        _, notes = self.search('покуп')
+        self.assertEqual(notes, [self.in_title, self.in_text])
+
+    def test_search_highlight_is_escaped(self):
+        ''' Совпадения выделяются, разметка из текста экранируется '''
+        response, _ = self.search('неделю')
+        self.assertContains(
+            response, 'Список покупок &lt;b&gt;на <mark>неделю</mark>'
+        )
+
+    def test_search_index_follows_changes(self):
+        ''' Индекс обновляется при правке и удалении заметки '''
+        self.in_text.text = 'Вынести мусор'
+        self.in_text.save()
+        self.assertEqual(self.search('мусор')[1], [self.in_text])
+        self.in_text.delete()
+        self.assertEqual(self.search('мусор')[1], [])
+
+    def test_search_ignores_query_syntax(self):
+        ''' Операторы поиска во вводе пользователя не ломают запрос '''
+        response, notes = self.search('торт"* ^({')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(notes, [self.in_title])
+
+    def test_last_word_is_searched_by_prefix(self):
+        ''' Недописанное последнее слово ищется по префиксу в обеих базах '''
+        words = ['список', 'покуп']
+        self.assertEqual(tsquery(words), "'список' & 'покуп':*")
+        self.assertTrue(fts5_query(1, words).endswith('"покуп"*)'))
+
 
 class TestDetailPage(TestCase):
 
@@ -1,16 +1,33 @@
+import json
+import tempfile
 from http import HTTPStatus
+from io import StringIO
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from pytils.translit import slugify
 
+from notes import slow_queries
+from notes.bulk import import_notes
 from notes.forms import WARNING
 from notes.models import Note
+from notes.slugs import build_slug, next_free_slug
+from yanote.instrumentation import PerformanceMiddleware
 
 
 User = get_user_model()
+# Признак плана в журнале: SQLite пишет SEARCH для поиска по индексу, а
+# PostgreSQL на маленькой тестовой таблице может выбрать и Seq Scan.
+PLAN_MARKERS = {'sqlite': 'SEARCH', 'postgresql': 'Scan'}
 
 
 class TestNoteCreation(TestCase):
@@ -75,6 +92,75 @@ class TestNoteCreation(TestCase):
         note = Note.objects.get()
         self.assertEqual(note.slug, slugify(self.NOTE_TITLE))
 
+    def test_same_titles_get_numbered_slugs(self):
+        ''' Одинаковые заголовки получают адреса title, title-2, title-3 '''
+        del self.form_data['slug']
+        for _ in range(3):
+            self.auth_client.post(self.url, data=self.form_data)
+        base = slugify(self.NOTE_TITLE)
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {base, f'{base}-2', f'{base}-3'},
+        )
+
+    def test_long_titles_get_numbered_slugs(self):
+        ''' Номер не срезает основу адреса длинного заголовка '''
+        max_length = Note._meta.get_field('slug').max_length
+        title = 'Щ' * 60
+        self.assertGreater(len(slugify(title)), max_length)
+        notes = [
+            Note.objects.create(
+                title=title, text=self.NOTE_TEXT, author=self.user
+            )
+            for _ in range(3)
+        ]
+        base = build_slug(title, max_length)
+        self.assertEqual(
+            [note.slug for note in notes],
+            [base, f'{base}-2', f'{base}-3'],
+        )
+
+    def test_slug_taken_concurrently_is_retried(self):
+        ''' Адрес, занятый параллельным запросом, заменяется следующим '''
+        base = slugify(self.NOTE_TITLE)
+        Note.objects.create(
+            title=self.NOTE_TITLE, text=self.NOTE_TEXT, author=self.user
+        )
+        with patch(
+            'notes.models.next_free_slug', side_effect=(base, f'{base}-2')
+        ) as allocate:
+            note = Note.objects.create(
+                title=self.NOTE_TITLE, text=self.NOTE_TEXT, author=self.user
+            )
+        self.assertEqual(allocate.call_count, 2)
+        self.assertEqual(note.slug, f'{base}-2')
+
+    def test_slug_is_built_once_per_title(self):
+        ''' Повторный заголовок берёт адрес из кэша build_slug '''
+        build_slug.cache_clear()
+        for _ in range(2):
+            Note.objects.create(
+                title=self.NOTE_TITLE, text=self.NOTE_TEXT, author=self.user
+            )
+        info = build_slug.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_next_free_slug(self):
+        ''' Следующий номер ищется одним запросом по занятым адресам '''
+        for slug in ('plan', 'plan-2', 'plan-10', 'plan-x', 'planer'):
+            Note.objects.create(
+                title='План', text=self.NOTE_TEXT, slug=slug, author=self.user
+            )
+        with CaptureQueriesContext(connection) as captured:
+            slug = next_free_slug(Note.objects.all(), 'plan', 100)
+        self.assertEqual(slug, 'plan-11')
+        # Занятые адреса не передаются: база отдаёт одну строку-агрегат.
+        [query] = captured.captured_queries
+        self.assertIn('MAX(', query['sql'])
+        notes = Note.objects.all()
+        self.assertEqual(next_free_slug(notes, 'plan', 6), 'pla-11')
+        self.assertEqual(next_free_slug(notes, 'new', 100), 'new')
+
 
 class TestNoteEditDelete(TestCase):
     NOTE_TEXT = 'Текст заметки'
@@ -121,6 +207,7 @@ class TestNoteEditDelete(TestCase):
         self.assertRedirects(response, f'{self.redirect_url}')
         self.note.refresh_from_db()
         self.assertEqual(self.note.text, self.NEW_NOTE_TEXT)
+        self.assertEqual(self.note.excerpt, self.NEW_NOTE_TEXT)
 
     def test_user_cant_edit_note_of_another_user(self):
         ''' Проверяем, что пользователь не может изменить чужую заметку. '''
@@ -128,3 +215,152 @@ class TestNoteEditDelete(TestCase):
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.note.refresh_from_db()
         self.assertEqual(self.note.text, self.NOTE_TEXT)
+
+
+class TestSlowQueryLog(TestCase):
+
+    @override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_MAX_PER_MINUTE=1)
+    @patch.object(slow_queries, 'rate_limiter', slow_queries.RateLimiter())
+    def test_slow_query_is_logged_with_plan(self):
+        ''' Медленный запрос попадает в журнал с планом и местом вызова '''
+        with self.assertLogs('notes.slow_queries') as logs:
+            with connection.execute_wrapper(slow_queries.log_slow_query):
+                Note.objects.filter(slug='tester').first()
+                Note.objects.count()
+        self.assertEqual(len(logs.records), 1)
+        message = logs.records[0].getMessage()
+        self.assertIn('notes_note', message)
+        self.assertIn('test_logic.py', message)
+        plan = message.split('План:\n')[1]
+        self.assertIn(PLAN_MARKERS[connection.vendor], plan)
+
+    @override_settings(PERF_INSTRUMENTATION=True, SLOW_QUERY_MS=1000)
+    @patch.object(connection, 'execute_wrappers', [])
+    def test_slow_query_log_survives_instrumentation(self):
+        ''' Журнал не теряется, если соединение открылось посреди замера '''
+        def view(request):
+            # Так выглядит новое соединение после закрытого в прошлом
+            # запросе.
+            connection_created.send(
+                sender=connection.__class__, connection=connection
+            )
+            Note.objects.count()
+            return HttpResponse()
+
+        middleware = PerformanceMiddleware(view)
+        for _ in range(3):
+            middleware(RequestFactory().get('/'))
+        self.assertEqual(
+            connection.execute_wrappers, [slow_queries.log_slow_query]
+        )
+
+
+class TestNotesBulk(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.reader = User.objects.create(username='Читатель')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.import_url = reverse('notes:import')
+        Note.objects.create(
+            title='Список покупок', text='Хлеб', author=cls.reader
+        )
+
+    def upload(self, lines):
+        content = ''.join(
+            json.dumps(line, ensure_ascii=False) + '\n' for line in lines
+        )
+        return self.author_client.post(self.import_url, data={
+            'file': SimpleUploadedFile('notes.jsonl', content.encode()),
+        })
+
+    def test_import_allocates_slugs(self):
+        ''' Импорт подбирает адреса, занятые адреса не трогает '''
+        response = self.upload([
+            {'title': 'Список покупок', 'text': f'Текст {index}'}
+            for index in range(3)
+        ] + [{'title': 'Своя', 'text': 'Текст', 'slug': 'own'}])
+        self.assertRedirects(response, reverse('notes:success'))
+        base = slugify('Список покупок')
+        self.assertEqual(
+            set(
+                Note.objects.filter(author=self.author).values_list(
+                    'slug', flat=True
+                )
+            ),
+            {f'{base}-2', f'{base}-3', f'{base}-4', 'own'},
+        )
+        # bulk_create обходит save(), анонс заполняет менеджер.
+        self.assertEqual(Note.objects.get(slug='own').excerpt, 'Текст')
+
+    def test_import_queries_per_chunk(self):
+        ''' Число запросов зависит от числа пачек, а не заметок '''
+        lines = [
+            json.dumps({'title': 'Заметка', 'text': 'Текст'})
+            for _ in range(5)
+        ]
+        with CaptureQueriesContext(connection) as captured:
+            created = import_notes(lines, self.author, chunk_size=2)
+        self.assertEqual(created, 5)
+        statements = [
+            query['sql'].split()[0] for query in captured.captured_queries
+        ]
+        # По вставке на каждую из трёх пачек. Занятые адреса для общей
+        # основы читаются один раз, явных адресов для проверки нет.
+        self.assertEqual(statements.count('INSERT'), 3)
+        self.assertEqual(statements.count('SELECT'), 1)
+
+    def test_import_is_all_or_nothing(self):
+        ''' Ошибка в одной строке отменяет весь импорт '''
+        notes_count = Note.objects.count()
+        for lines, error in (
+            (
+                [{'title': 'Первая', 'text': 'Текст'}, {'title': 'Вторая'}],
+                'Строка 2: text',
+            ),
+            (
+                [{'title': 'Чужая', 'text': 'Текст', 'slug': 'own'}] * 2,
+                'Строка 2: own' + WARNING,
+            ),
+        ):
+            with self.subTest(error=error):
+                response = self.upload(lines)
+                self.assertContains(response, error)
+                self.assertEqual(Note.objects.count(), notes_count)
+
+    def test_import_rejects_non_utf8_file(self):
+        ''' Файл не в UTF-8 — ошибка формы, а не ошибка сервера '''
+        content = '{"title": "Первая", "text": "Текст"}\n'.encode('cp1251')
+        response = self.author_client.post(self.import_url, data={
+            'file': SimpleUploadedFile('notes.jsonl', content),
+        })
+        self.assertContains(response, 'Строка 1: файл должен быть')
+        self.assertFalse(Note.objects.filter(author=self.author).exists())
+
+    def test_export_streams_only_own_notes(self):
+        ''' Выгрузка отдаёт заметки автора потоком JSON Lines '''
+        self.upload([{'title': 'Моя', 'text': 'Текст', 'slug': 'mine'}])
+        response = self.author_client.get(reverse('notes:export'))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{'title': 'Моя', 'text': 'Текст', 'slug': 'mine'}],
+        )
+
+    def test_import_export_commands(self):
+        ''' Команды переносят заметки между пользователями '''
+        output = StringIO()
+        call_command('export_notes', self.reader.username, '-', stdout=output)
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as file:
+            file.write(output.getvalue().replace('"slug": "', '"slug": "c-'))
+            file.flush()
+            call_command(
+                'import_notes', self.author.username, file.name,
+                stdout=StringIO(),
+            )
+        note = Note.objects.get(author=self.author)
+        self.assertEqual(note.title, 'Список покупок')
+        self.assertEqual(note.slug, 'c-' + slugify('Список покупок'))
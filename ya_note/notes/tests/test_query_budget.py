@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes import urls
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestQueryBudget(TestCase):
+    # Верхняя граница суммарного времени SQL на один запрос страницы, секунды.
+    QUERY_TIME_BUDGET = 0.5
+    # Сессия и пользователь — 2 запроса на каждой странице.
+    QUERY_BUDGETS = {
+        'home': 2,
+        'add': 2,
+        'success': 2,
+        # Заметка по slug.
+        'edit': 3,
+        'detail': 3,
+        'delete': 3,
+        # Заметки пользователя.
+        'list': 3,
+        'import': 2,
+        'export': 3,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.reader = User.objects.create(username='Читатель')
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Просто текст. ' * 50,
+                slug=f'note-{index}',
+                author=cls.author if index % 2 else cls.reader,
+            )
+            for index in range(3000)
+        )
+        cls.note = Note.objects.filter(author=cls.author).last()
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def assertQueryBudget(self, captured, budget):
+        """Проверяет число и время запросов, при превышении выводит их SQL."""
+        queries = captured.captured_queries
+        total_time = sum(float(query['time']) for query in queries)
+        listing = '\n'.join(
+            f'{index}. [{query["time"]}s] {query["sql"]}'
+            for index, query in enumerate(queries, start=1)
+        )
+        message = (
+            f'{len(queries)} запросов за {total_time:.3f}s при бюджете '
+            f'{budget} запросов и {self.QUERY_TIME_BUDGET}s:\n{listing}'
+        )
+        self.assertLessEqual(len(queries), budget, message)
+        self.assertLessEqual(total_time, self.QUERY_TIME_BUDGET, message)
+
+    def test_every_route_has_budget(self):
+        ''' Проверяем, что бюджет задан для каждого маршрута notes.urls '''
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(self.QUERY_BUDGETS))
+
+    def test_route_query_budget(self):
+        ''' Проверяем число и время запросов страниц на объёмных данных '''
+        for name, budget in self.QUERY_BUDGETS.items():
+            args = (
+                (self.note.slug,)
+                if name in ('edit', 'detail', 'delete') else None
+            )
+            with self.subTest(name=name):
+                url = reverse(f'notes:{name}', args=args)
+                with CaptureQueriesContext(connection) as captured:
+                    response = self.client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertQueryBudget(captured, budget)
+
+    def test_search_query_budget(self):
+        ''' Поиск по заметкам укладывается в бюджет списка '''
+        url = reverse('notes:list')
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(url, {'q': 'заметка 15'})
+        self.assertQueryBudget(captured, self.QUERY_BUDGETS['list'])
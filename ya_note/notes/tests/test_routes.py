@@ -1,7 +1,7 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from notes.models import Note
@@ -56,6 +56,8 @@ class TestRoutes(TestCase):
             ('notes:list', None),
             ('notes:success', None),
             ('notes:add', None),
+            ('notes:import', None),
+            ('notes:export', None),
         )
         self.client.force_login(self.reader)
         for name, args in urls:
@@ -87,6 +89,8 @@ class TestRoutes(TestCase):
             ('notes:add', None),
             ('notes:list', None),
             ('notes:success', None),
+            ('notes:import', None),
+            ('notes:export', None),
             ('notes:edit', (self.notes.slug,)),
             ('notes:detail', (self.notes.slug,)),
             ('notes:delete', (self.notes.slug,)),
@@ -96,3 +100,32 @@ class TestRoutes(TestCase):
                 redirect_url = f'{login_url}?next={url}'
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+    def test_metrics_availability(self):
+        ''' Метрики видят сотрудники и сборщик с токеном '''
+        staff = User.objects.create(username='Сотрудник', is_staff=True)
+        url = reverse('metrics')
+        self.client.force_login(self.author)
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.FORBIDDEN
+        )
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.OK)
+        self.client.logout()
+        with override_settings(PERF_METRICS_TOKEN='secret'):
+            response = self.client.get(
+                url, HTTP_AUTHORIZATION='Bearer secret'
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(PERF_INSTRUMENTATION=True)
+    def test_performance_instrumentation(self):
+        ''' Ответ несёт Server-Timing, маршрут попадает в метрики '''
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('notes:list'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.client.force_login(
+            User.objects.create(username='Сотрудник', is_staff=True)
+        )
+        metrics = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('yanote_db_queries_count{route="notes:list"}', metrics)
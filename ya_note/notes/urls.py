@@ -1,5 +1,6 @@
 from django.urls import path
 from notes import views
+from yanote.async_views import read_view
 
 app_name = 'notes'
 
@@ -7,8 +8,10 @@ urlpatterns = [
     path('', views.Home.as_view(), name='home'),
     path('add/', views.NoteCreate.as_view(), name='add'),
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
-    path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
+    path('note/<slug:slug>/', read_view(views.NoteDetail), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
-    path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/', read_view(views.NotesList), name='list'),
+    path('notes/import/', views.NotesImport.as_view(), name='import'),
+    path('notes/export/', views.NotesExport.as_view(), name='export'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
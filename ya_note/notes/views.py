@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .bulk import CHUNK_SIZE, export_notes, import_notes
+from .forms import NoteForm, NotesUploadForm
 from .models import Note
+from .pagination import paginate_keyset
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -50,10 +56,62 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """Список всех заметок пользователя или найденных по запросу q."""
     template_name = 'notes/list.html'
 
+    ordering = ('id',)
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        self.next_cursor = None
+        if self.query:
+            return search_notes(self.request.user, self.query)
+        # Страницы идут по индексу (author, id); вместо текста заметок
+        # читается только короткий анонс.
+        object_list, self.next_cursor = paginate_keyset(
+            super().get_queryset().only('id', 'slug', 'title', 'excerpt'),
+            self.ordering,
+            self.request.GET.get('cursor'),
+            settings.NOTES_COUNT_ON_PAGE,
+        )
+        return object_list
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            query=self.query, next_cursor=self.next_cursor, **kwargs
+        )
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NotesImport(LoginRequiredMixin, generic.FormView):
+    """Загрузка заметок из файла JSON Lines."""
+    template_name = 'notes/import.html'
+    form_class = NotesUploadForm
+    success_url = reverse_lazy('notes:success')
+    chunk_size = CHUNK_SIZE
+
+    def form_valid(self, form):
+        try:
+            import_notes(
+                form.cleaned_data['file'], self.request.user, self.chunk_size
+            )
+        except ValidationError as error:
+            form.add_error('file', error)
+            return self.form_invalid(form)
+        return super().form_valid(form)
+
+
+class NotesExport(NoteBase, generic.View):
+    """Выгрузка заметок пользователя в JSON Lines."""
+
+    def get(self, request, *args, **kwargs):
+        response = StreamingHttpResponse(
+            export_notes(self.get_queryset()),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'attachment; filename="notes.jsonl"'
+        return response
@@ -0,0 +1,34 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL с проверкой постоянного соединения.
+
+    В Django 3.2 нет CONN_HEALTH_CHECKS: оборванное сервером соединение
+    обнаруживается только ошибкой в запросе пользователя. Здесь, как и в
+    новых версиях Django, перед первым обращением к базе в каждом
+    HTTP-запросе повторно используемое соединение проверяется и при
+    необходимости открывается заново.
+    """
+    health_check_done = False
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,6 +23,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,12 +54,47 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Профиль базы данных выбирается переменной окружения DJANGO_DB_PROFILE:
+# sqlite (по умолчанию, для установки на одном сервере) или postgres.
+DB_PROFILE = os.getenv('DJANGO_DB_PROFILE', 'sqlite')
+
+if DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'yanote.db_backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'yanote'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Соединение переживает запрос и используется повторно.
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+            # Перед первым запросом в HTTP-запросе проверяем, живо ли соединение.
+            'CONN_HEALTH_CHECKS': True,
+            # В режиме пулинга транзакций pgbouncer серверные курсоры не работают.
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_PGBOUNCER') == '1',
+            'OPTIONS': {
+                'connect_timeout': 5,
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'yanote.db_backends.sqlite3',
+            'NAME': os.getenv('SQLITE_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': 20,
+            },
+            # Выполняются на каждом новом соединении.
+            'PRAGMAS': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'busy_timeout': 20000,
+                'mmap_size': 256 * 1024 * 1024,
+            },
+        }
     }
-}
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -87,3 +124,22 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 100
+
+# Асинхронные страницы чтения для запуска под ASGI, см. async_views.
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS') == '1'
+
+# Замеры запросов: заголовок Server-Timing и гистограммы на /metrics/.
+PERF_INSTRUMENTATION = os.getenv('DJANGO_PERF_INSTRUMENTATION') == '1'
+# Токен для сборщика метрик; без него метрики видят только сотрудники.
+PERF_METRICS_TOKEN = os.getenv('DJANGO_PERF_METRICS_TOKEN', '')
+
+# Порог медленного SQL-запроса в миллисекундах; None выключает журнал.
+SLOW_QUERY_MS = (
+    float(os.environ['DJANGO_SLOW_QUERY_MS'])
+    if os.getenv('DJANGO_SLOW_QUERY_MS') else None
+)
+# Доля медленных запросов, попадающих в журнал, и предел записей в минуту.
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv('DJANGO_SLOW_QUERY_SAMPLE_RATE', 1))
+SLOW_QUERY_MAX_PER_MINUTE = int(os.getenv('DJANGO_SLOW_QUERY_MAX_PER_MINUTE', 60))